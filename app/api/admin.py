@@ -1,30 +1,104 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Optional
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from prisma import Prisma
 from prisma.models import User
 from app.core.deps import get_db, require_permission
 from app.core.permissions import Permission
-from app.schemas.user import UserResponse
+from app.core.admission import admission_controller
+from app.core.pagination import Page, paginate, paginated
+from app.core.stats import stats_cache
+from app.core.facets import lawyer_facets
+from app.core.specializations import specialization_slug
+from app.core.export import stream_transactions_csv
+from app.core.jobs import job_runner
+from app.core.compression import response_compressor
+from app.core.loaders import loader_metrics
+from app.core.purge import purge_user
+from app.core.related import refresh_related_posts, refresh_running
+from app.core.user_import import import_users, import_results_ndjson, parse_rows, spool_upload
+from app.schemas.user import UserResponse, UserPurgeResponse
+from app.schemas.admin import (
+    LawyerBulkVerifyRequest,
+    UserBulkDeactivateRequest,
+    BulkUpdateResult
+)
+from app.schemas.stats import AdminStats
+from app.schemas.transaction import TransactionStatus, TransactionType
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Ids per update_many in bulk endpoints
+BULK_BATCH_SIZE = 1000
+
+
+def _batches(ids: list[int]):
+    unique_ids = list(dict.fromkeys(ids))
+    for start in range(0, len(unique_ids), BULK_BATCH_SIZE):
+        yield unique_ids[start:start + BULK_BATCH_SIZE]
+
+
+async def _existing_ids(db: Prisma, table: str, ids: list[int]) -> set[int]:
+    rows = await db.query_raw(f"SELECT id FROM {table} WHERE id = ANY($1::int[])", ids)
+    return {row["id"] for row in rows}
+
+
+async def _set_lawyers_verified(db: Prisma, request: LawyerBulkVerifyRequest, verified: bool) -> BulkUpdateResult:
+    """Bulk verify/unverify: one update_many per batch of ids, or one for a filter"""
+    if request.filter is not None:
+        where = {"isVerified": not verified}
+        if request.filter.specialization:
+            # Same tag matching as /lawyers/search and /lawyers/match
+            slug = specialization_slug(request.filter.specialization)
+            where["specializations"] = {"some": {"tag": {"is": {"slug": slug}}}}
+        experience = {}
+        if request.filter.minExperienceYears is not None:
+            experience["gte"] = request.filter.minExperienceYears
+        if request.filter.maxExperienceYears is not None:
+            experience["lte"] = request.filter.maxExperienceYears
+        if experience:
+            where["experienceYears"] = experience
+
+        updated = await db.lawyerprofile.update_many(where=where, data={"isVerified": verified})
+        stats_cache.lawyer_verification_changed(verified, updated)
+        if updated:
+            lawyer_facets.reload(db)
+        return BulkUpdateResult(updated=updated)
+
+    updated = 0
+    not_found: list[int] = []
+    for batch in _batches(request.ids):
+        existing = await _existing_ids(db, "lawyer_profiles", batch)
+        not_found.extend(i for i in batch if i not in existing)
+        if existing:
+            # Only rows that actually change, so the stats adjustment is exact
+            updated += await db.lawyerprofile.update_many(
+                where={"id": {"in": list(existing)}, "isVerified": not verified},
+                data={"isVerified": verified}
+            )
+
+    stats_cache.lawyer_verification_changed(verified, updated)
+    if updated:
+        lawyer_facets.reload(db)
+    return BulkUpdateResult(updated=updated, notFound=not_found)
+
 
 @router.get("/users", response_model=list[UserResponse])
 async def get_all_users(
     current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_USERS))],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 100
+    page: Annotated[Page, Depends(paginate(100))],
+    response: Response
 ):
     """Get all users (admin only)"""
-    users = await db.user.find_many(
-        skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+    return await paginated(
+        db, db.user, "users", page, response, UserResponse,
+        order=[{"createdAt": "desc"}, {"id": "desc"}],
+        where={"deletedAt": None}
     )
 
-    return users
-
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
@@ -43,16 +117,16 @@ async def get_user_by_id(
     return user
 
 
-@router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/users/{user_id}", response_model=UserPurgeResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_user(
     user_id: int,
     current_user: Annotated[User, Depends(require_permission(Permission.DELETE_USERS))],
     db: Annotated[Prisma, Depends(get_db)]
 ):
-    """Delete user (admin only)"""
+    """Delete user (admin only): soft-deletes now, purges the user's data in the background"""
     # Check if user exists
     user = await db.user.find_unique(where={"id": user_id})
-    if not user:
+    if not user or user.deletedAt is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
@@ -65,10 +139,121 @@ async def delete_user(
             detail="Cannot delete yourself"
         )
 
-    # Delete user
-    await db.user.delete(where={"id": user_id})
+    # Soft delete: the user can no longer sign in or use existing tokens
+    now = datetime.now(timezone.utc)
+    await db.user.update(
+        where={"id": user_id},
+        data={"isActive": False, "deletedAt": now}
+    )
+    await db.refreshtoken.update_many(
+        where={"userId": user_id, "revokedAt": None},
+        data={"revokedAt": now}
+    )
+
+    purge = await db.userpurge.create(data={"userId": user_id})
+    job_runner.enqueue("default", purge_user, db, purge.id, user_id)
+
+    return purge
+
+
+@router.get("/user-purges/{purge_id}", response_model=UserPurgeResponse)
+async def get_user_purge(
+    purge_id: int,
+    current_user: Annotated[User, Depends(require_permission(Permission.DELETE_USERS))],
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Get the status of a user purge (admin only)"""
+    purge = await db.userpurge.find_unique(where={"id": purge_id})
+    if not purge:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User purge not found"
+        )
+
+    return purge
+
+
+@router.post("/users/import")
+async def bulk_import_users(
+    request: Request,
+    current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_USERS))],
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """
+    Import users from a CSV (with header) or NDJSON body (admin only).
+
+    Rows use the UserCreate fields. Results stream back as NDJSON, one line per row.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        fmt = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson"
+        )
+
+    upload = await spool_upload(request.stream())
+    results = import_users(db, parse_rows(upload, fmt))
+    return StreamingResponse(
+        import_results_ndjson(results),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(upload.close)
+    )
+
+
+@router.patch("/users/deactivate", response_model=BulkUpdateResult)
+async def bulk_deactivate_users(
+    request: UserBulkDeactivateRequest,
+    current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_USERS))],
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Deactivate many users at once (admin only)"""
+    if current_user.id in request.ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot deactivate yourself"
+        )
+
+    updated = 0
+    not_found: list[int] = []
+    now = datetime.now(timezone.utc)
+    for batch in _batches(request.ids):
+        existing = await _existing_ids(db, "users", batch)
+        not_found.extend(i for i in batch if i not in existing)
+        if existing:
+            updated += await db.user.update_many(
+                where={"id": {"in": list(existing)}, "isActive": True},
+                data={"isActive": False}
+            )
+            await db.refreshtoken.update_many(
+                where={"userId": {"in": list(existing)}, "revokedAt": None},
+                data={"revokedAt": now}
+            )
+
+    return BulkUpdateResult(updated=updated, notFound=not_found)
 
-    return None
+
+@router.patch("/lawyers/verify", response_model=BulkUpdateResult)
+async def bulk_verify_lawyers(
+    request: LawyerBulkVerifyRequest,
+    current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_LAWYERS))],
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Verify many lawyer profiles by ids or filter (admin only)"""
+    return await _set_lawyers_verified(db, request, True)
+
+
+@router.patch("/lawyers/unverify", response_model=BulkUpdateResult)
+async def bulk_unverify_lawyers(
+    request: LawyerBulkVerifyRequest,
+    current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_LAWYERS))],
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Unverify many lawyer profiles by ids or filter (admin only)"""
+    return await _set_lawyers_verified(db, request, False)
 
 
 @router.patch("/lawyers/{lawyer_id}/verify", status_code=status.HTTP_200_OK)
@@ -91,6 +276,9 @@ async def verify_lawyer(
         where={"id": lawyer_id},
         data={"isVerified": True}
     )
+    if not profile.isVerified:
+        stats_cache.lawyer_verification_changed(True)
+        lawyer_facets.profile_changed(profile, updated_profile)
 
     return {"message": "Lawyer verified successfully", "profile": updated_profile}
 
@@ -115,5 +303,83 @@ async def unverify_lawyer(
         where={"id": lawyer_id},
         data={"isVerified": False}
     )
+    if profile.isVerified:
+        stats_cache.lawyer_verification_changed(False)
+        lawyer_facets.profile_changed(profile, updated_profile)
 
     return {"message": "Lawyer unverified successfully", "profile": updated_profile}
+
+
+@router.get("/stats", response_model=AdminStats)
+async def get_stats(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))]
+):
+    """Get dashboard totals from the in-memory stats cache (admin only)"""
+    return stats_cache.snapshot()
+
+
+@router.get("/transactions/export")
+async def export_transactions(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))],
+    db: Annotated[Prisma, Depends(get_db)],
+    from_: Annotated[Optional[datetime], Query(alias="from")] = None,
+    to: Optional[datetime] = None,
+    status_filter: Annotated[Optional[TransactionStatus], Query(alias="status")] = None,
+    type: Optional[TransactionType] = None,
+    cursor: Annotated[int, Query(ge=0)] = 0,
+    gzip: bool = False
+):
+    """
+    Stream transactions as CSV in id order (admin only).
+
+    To resume an interrupted download, pass the last received id as `cursor`.
+    """
+    filename = "transactions.csv.gz" if gzip else "transactions.csv"
+    return StreamingResponse(
+        stream_transactions_csv(
+            db,
+            after_id=cursor,
+            date_from=from_,
+            date_to=to,
+            status=status_filter.value if status_filter else None,
+            type=type.value if type else None,
+            compress=gzip,
+        ),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/related-posts/refresh", status_code=status.HTTP_202_ACCEPTED)
+async def refresh_related(
+    current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_BLOG))],
+    db: Annotated[Prisma, Depends(get_db)],
+    full: bool = False
+):
+    """Recompute related posts in the background (admin only)"""
+    if await refresh_running(db):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Related posts refresh already running"
+        )
+
+    if not job_runner.enqueue("default", refresh_related_posts, db, full):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full, try again later"
+        )
+
+    return {"message": "Related posts refresh started"}
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK)
+async def get_metrics(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))]
+):
+    """Get runtime metrics (admin only)"""
+    return {
+        "admission": admission_controller.metrics(),
+        "compression": response_compressor.metrics(),
+        "jobs": job_runner.metrics(),
+        "loaders": loader_metrics.metrics(),
+    }
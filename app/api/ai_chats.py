@@ -1,8 +1,11 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from prisma import Prisma
 from prisma.models import User
 from app.core.deps import get_db, get_current_user
+from app.core.pagination import Page, paginate, paginated
+from app.core.jobs import job_runner
 from app.schemas.ai_chat import (
     AIChatCreate,
     AIChatUpdate,
@@ -15,6 +18,14 @@ from app.schemas.ai_chat import (
 router = APIRouter(prefix="/ai-chats", tags=["AI Chats"])
 
 
+async def _touch_chat(db: Prisma, chat_id: int, updated_at: datetime) -> None:
+    # update_many: the chat may have been deleted in the meantime
+    await db.aichat.update_many(
+        where={"id": chat_id},
+        data={"updatedAt": updated_at}
+    )
+
+
 @router.post("/", response_model=AIChatResponse, status_code=status.HTTP_201_CREATED)
 async def create_chat(
     chat_data: AIChatCreate,
@@ -36,19 +47,16 @@ async def create_chat(
 async def get_my_chats(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 50
+    page: Annotated[Page, Depends(paginate(50))],
+    response: Response
 ):
     """Get current user's AI chats"""
-    chats = await db.aichat.find_many(
-        where={"userId": current_user.id},
-        skip=skip,
-        take=limit,
-        order={"updatedAt": "desc"}
+    return await paginated(
+        db, db.aichat, "ai_chats", page, response, AIChatResponse,
+        order=[{"updatedAt": "desc"}, {"id": "desc"}],
+        where={"userId": current_user.id}
     )
 
-    return chats
-
 
 @router.get("/{chat_id}", response_model=AIChatWithMessages)
 async def get_chat_by_id(
@@ -169,11 +177,8 @@ async def add_message_to_chat(
         }
     )
 
-    # Update chat's updatedAt
-    await db.aichat.update(
-        where={"id": chat_id},
-        data={"updatedAt": message.createdAt}
-    )
+    # Update chat's updatedAt in the background
+    job_runner.enqueue("writes", _touch_chat, db, chat_id, message.createdAt)
 
     return message
 
@@ -1,14 +1,52 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from prisma import Prisma
+from app.config import settings
 from app.core.deps import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
-from app.schemas.auth import LoginRequest, Token
+from app.core.rate_limit import login_rate_limiter
+from app.core.stats import stats_cache
+from app.core.jobs import job_runner
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    create_refresh_token,
+    hash_refresh_token,
+    password_needs_rehash,
+    dummy_verify_password,
+)
+from app.schemas.auth import LoginRequest, Token, RefreshRequest
 from app.schemas.user import UserCreate, UserResponse
+import uuid
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+async def _issue_refresh_token(db: Prisma, user_id: int, family_id: str) -> tuple[str, int]:
+    """Store a new refresh token in the given family, return (token, row id)"""
+    token = create_refresh_token()
+    record = await db.refreshtoken.create(
+        data={
+            "userId": user_id,
+            "tokenHash": hash_refresh_token(token),
+            "familyId": family_id,
+            "expiresAt": datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        }
+    )
+    return token, record.id
+
+
+async def _rehash_password(db: Prisma, user_id: int, old_hash: str, password: str) -> None:
+    """Replace an outdated password hash, unless the password changed meanwhile"""
+    new_hash = await run_in_threadpool(get_password_hash, password)
+    await db.user.update_many(
+        where={"id": user_id, "password": old_hash},
+        data={"password": new_hash}
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
@@ -35,6 +73,7 @@ async def register(
             "role": user_data.role.value if hasattr(user_data.role, 'value') else user_data.role,
         }
     )
+    stats_cache.user_created()
 
     return user
 
@@ -42,12 +81,19 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
+    request: Request,
     db: Annotated[Prisma, Depends(get_db)]
 ):
     """Login and get access token"""
+    # Throttle before any database or bcrypt work
+    client_ip = request.client.host if request.client else "unknown"
+    await login_rate_limiter.check(client_ip, login_data.email)
+
     # Find user
     user = await db.user.find_unique(where={"email": login_data.email})
     if not user:
+        # Keep response time the same as for a wrong password
+        dummy_verify_password(login_data.password)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -69,7 +115,65 @@ async def login(
             detail="Inactive user"
         )
 
-    # Create access token
+    # Upgrade hashes made with old cost settings outside the request
+    if password_needs_rehash(user.password):
+        job_runner.enqueue("default", _rehash_password, db, user.id, user.password, login_data.password)
+
+    # Create access token and start a new refresh token family
     access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token, _ = await _issue_refresh_token(db, user.id, uuid.uuid4().hex)
+
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_data: RefreshRequest,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Exchange a refresh token for a new access token (rotates the refresh token)"""
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    stored = await db.refreshtoken.find_unique(
+        where={"tokenHash": hash_refresh_token(refresh_data.refresh_token)},
+        include={"user": True}
+    )
+    if not stored:
+        raise invalid
+
+    now = datetime.now(timezone.utc)
+
+    # Claim the token; a second use (replay or race) revokes the whole family
+    claimed = await db.refreshtoken.update_many(
+        where={"id": stored.id, "revokedAt": None},
+        data={"revokedAt": now}
+    )
+    if claimed == 0:
+        await db.refreshtoken.update_many(
+            where={"familyId": stored.familyId, "revokedAt": None},
+            data={"revokedAt": now}
+        )
+        raise invalid
+
+    if stored.expiresAt <= now:
+        raise invalid
+
+    if not stored.user or not stored.user.isActive:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    refresh_token, new_id = await _issue_refresh_token(db, stored.userId, stored.familyId)
+    await db.refreshtoken.update(
+        where={"id": stored.id},
+        data={"replacedById": new_id}
+    )
+
+    access_token = create_access_token(data={"sub": str(stored.userId)})
 
-    return Token(access_token=access_token)
+    return Token(access_token=access_token, refresh_token=refresh_token)
@@ -1,9 +1,11 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from prisma import Prisma
 from prisma.models import User
 from app.core.deps import get_db, require_permission
 from app.core.permissions import Permission
+from app.core.pagination import Page, paginate, paginated
+from app.core.feeds import feed_cache
 from app.schemas.blog import (
     BlogCategoryCreate,
     BlogCategoryUpdate,
@@ -35,6 +37,7 @@ async def create_category(
             "description": category_data.description,
         }
     )
+    feed_cache.invalidate()
 
     return category
 
@@ -42,18 +45,15 @@ async def create_category(
 @router.get("/", response_model=list[BlogCategoryResponse])
 async def get_all_categories(
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 100
+    page: Annotated[Page, Depends(paginate(100))],
+    response: Response
 ):
     """Get all blog categories (public)"""
-    categories = await db.blogcategory.find_many(
-        skip=skip,
-        take=limit,
-        order={"name": "asc"}
+    return await paginated(
+        db, db.blogcategory, "blog_categories", page, response, BlogCategoryResponse,
+        order=[{"name": "asc"}, {"id": "asc"}]
     )
 
-    return categories
-
 
 @router.get("/{category_id}", response_model=BlogCategoryResponse)
 async def get_category_by_id(
@@ -119,6 +119,7 @@ async def update_category(
         where={"id": category_id},
         data=update_data
     )
+    feed_cache.invalidate()
 
     return updated_category
 
@@ -147,5 +148,6 @@ async def delete_category(
         )
 
     await db.blogcategory.delete(where={"id": category_id})
+    feed_cache.invalidate()
 
     return None
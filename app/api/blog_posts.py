@@ -1,28 +1,46 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from prisma import Prisma
 from prisma.models import User
+from app.core.loaders import LoaderRegistry
 from datetime import datetime
-from app.core.deps import get_db, get_current_user, require_permission
+from app.core.deps import get_db, get_loaders, get_current_user, require_permission
 from app.core.permissions import Permission
+from app.core.pagination import Page, paginate, paginated
+from app.core.stats import stats_cache
+from app.core.jobs import job_runner
+from app.core.content import render_post_fields
+from app.core.feeds import feed_cache
+from app.core.expand import BLOG_POST_RELATIONS, expand_param, expand_relations
+from app.core.trending import trending_posts
+from app.core.related import NEIGHBOURS
+from app.config import settings
 from app.schemas.blog import (
     BlogPostCreate,
     BlogPostUpdate,
-    BlogPostResponse
+    BlogPostResponse,
+    TrendingPostResponse,
+    RelatedPostResponse
 )
 
 router = APIRouter(prefix="/blog-posts", tags=["Blog Posts"])
 
 
+async def _increment_view_count(db: Prisma, post_id: int) -> None:
+    # Raw SQL: a Prisma update would bump updated_at, which feeds and related posts rely on
+    await db.execute_raw("UPDATE blog_posts SET view_count = view_count + 1 WHERE id = $1", post_id)
+
+
 @router.post("/", response_model=BlogPostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post_data: BlogPostCreate,
     current_user: Annotated[User, Depends(require_permission(Permission.CREATE_BLOG_POST))],
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ):
     """Create a new blog post (admin/lawyer only)"""
     # Check if category exists
-    category = await db.blogcategory.find_unique(where={"id": post_data.categoryId})
+    category = await loaders.loader("blogcategory").load(post_data.categoryId)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -51,8 +69,12 @@ async def create_post(
             "featuredImage": post_data.featuredImage,
             "isPublished": post_data.isPublished,
             "publishedAt": published_at,
+            **render_post_fields(post_data.content),
         }
     )
+    stats_cache.post_category_changed(None, post.categoryId)
+    if post.isPublished:
+        feed_cache.invalidate()
 
     return post
 
@@ -60,8 +82,10 @@ async def create_post(
 @router.get("/", response_model=list[BlogPostResponse])
 async def get_all_posts(
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 20,
+    page: Annotated[Page, Depends(paginate(20))],
+    response: Response,
+    expand: Annotated[frozenset[str], Depends(expand_param(*BLOG_POST_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)],
     published_only: bool = True,
     category_id: int = None
 ):
@@ -74,20 +98,43 @@ async def get_all_posts(
     if category_id:
         where_clause["categoryId"] = category_id
 
-    posts = await db.blogpost.find_many(
+    return await paginated(
+        db, db.blogpost, "blog_posts", page, response, BlogPostResponse,
+        order=[{"publishedAt": "desc"}, {"id": "desc"}],
         where=where_clause if where_clause else None,
-        skip=skip,
-        take=limit,
-        order={"publishedAt": "desc"}
+        transform=lambda rows: expand_relations(loaders, rows, BLOG_POST_RELATIONS, expand)
     )
 
-    return posts
+
+@router.get("/trending", response_model=list[TrendingPostResponse])
+async def get_trending_posts(
+    db: Annotated[Prisma, Depends(get_db)],
+    category_id: Optional[int] = None,
+    limit: Annotated[int, Query(ge=1)] = 10
+):
+    """Get posts ranked by recent (time-decayed) views (public)"""
+    ranked = trending_posts.top(category_id, min(limit, settings.TRENDING_TOP_K))
+    if not ranked:
+        return []
+
+    posts = await db.blogpost.find_many(
+        where={"id": {"in": [post_id for post_id, _ in ranked]}, "isPublished": True}
+    )
+    by_id = {post.id: post for post in posts}
+
+    return [
+        {**by_id[post_id].model_dump(), "trendingScore": score}
+        for post_id, score in ranked
+        if post_id in by_id
+    ]
 
 
 @router.get("/{post_id}", response_model=BlogPostResponse)
 async def get_post_by_id(
     post_id: int,
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    expand: Annotated[frozenset[str], Depends(expand_param(*BLOG_POST_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ):
     """Get blog post by ID (public)"""
     post = await db.blogpost.find_unique(where={"id": post_id})
@@ -98,19 +145,38 @@ async def get_post_by_id(
             detail="Post not found"
         )
 
-    # Increment view count
-    await db.blogpost.update(
-        where={"id": post_id},
-        data={"viewCount": post.viewCount + 1}
-    )
+    # Increment view count in the background
+    job_runner.enqueue("writes", _increment_view_count, db, post.id)
+    if post.isPublished:
+        trending_posts.record_view(post.id, post.categoryId)
 
+    await expand_relations(loaders, [post], BLOG_POST_RELATIONS, expand)
     return post
 
 
+@router.get("/{post_id}/related", response_model=list[RelatedPostResponse])
+async def get_related_posts(
+    post_id: int,
+    db: Annotated[Prisma, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=NEIGHBOURS)] = 5
+):
+    """Get precomputed related posts (public)"""
+    related = await db.relatedpost.find_many(
+        where={"postId": post_id, "related": {"is": {"isPublished": True}}},
+        include={"related": True},
+        order={"rank": "asc"},
+        take=limit
+    )
+
+    return [{**row.related.model_dump(), "similarity": row.score} for row in related]
+
+
 @router.get("/slug/{slug}", response_model=BlogPostResponse)
 async def get_post_by_slug(
     slug: str,
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    expand: Annotated[frozenset[str], Depends(expand_param(*BLOG_POST_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ):
     """Get blog post by slug (public)"""
     post = await db.blogpost.find_unique(where={"slug": slug})
@@ -121,12 +187,12 @@ async def get_post_by_slug(
             detail="Post not found"
         )
 
-    # Increment view count
-    await db.blogpost.update(
-        where={"slug": slug},
-        data={"viewCount": post.viewCount + 1}
-    )
+    # Increment view count in the background
+    job_runner.enqueue("writes", _increment_view_count, db, post.id)
+    if post.isPublished:
+        trending_posts.record_view(post.id, post.categoryId)
 
+    await expand_relations(loaders, [post], BLOG_POST_RELATIONS, expand)
     return post
 
 
@@ -134,19 +200,19 @@ async def get_post_by_slug(
 async def get_my_posts(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 50
+    page: Annotated[Page, Depends(paginate(50))],
+    response: Response,
+    expand: Annotated[frozenset[str], Depends(expand_param(*BLOG_POST_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ):
     """Get current user's blog posts"""
-    posts = await db.blogpost.find_many(
+    return await paginated(
+        db, db.blogpost, "blog_posts", page, response, BlogPostResponse,
+        order=[{"createdAt": "desc"}, {"id": "desc"}],
         where={"authorId": current_user.id},
-        skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+        transform=lambda rows: expand_relations(loaders, rows, BLOG_POST_RELATIONS, expand)
     )
 
-    return posts
-
 
 @router.put("/{post_id}", response_model=BlogPostResponse)
 async def update_post(
@@ -181,15 +247,28 @@ async def update_post(
             )
 
     update_data = post_update.model_dump(exclude_unset=True)
+    if update_data.get("content") is not None:
+        update_data.update(render_post_fields(update_data["content"]))
 
     # Set published date if publishing for the first time
     if post_update.isPublished and not post.isPublished:
         update_data["publishedAt"] = datetime.utcnow()
 
+    # Related posts are recomputed for posts whose text or visibility changed
+    content_fields = ("title", "content", "isPublished")
+    if any(field in update_data and update_data[field] != getattr(post, field) for field in content_fields):
+        update_data["contentUpdatedAt"] = datetime.utcnow()
+
     updated_post = await db.blogpost.update(
         where={"id": post_id},
         data=update_data
     )
+    if updated_post.categoryId != post.categoryId:
+        stats_cache.post_category_changed(post.categoryId, updated_post.categoryId)
+    if post.isPublished or updated_post.isPublished:
+        feed_cache.invalidate()
+    if not updated_post.isPublished:
+        trending_posts.remove(post_id)
 
     return updated_post
 
@@ -217,5 +296,9 @@ async def delete_post(
         )
 
     await db.blogpost.delete(where={"id": post_id})
+    stats_cache.post_category_changed(post.categoryId, None)
+    trending_posts.remove(post_id)
+    if post.isPublished:
+        feed_cache.invalidate()
 
     return None
@@ -0,0 +1,135 @@
+import gzip
+import zlib
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Annotated, AsyncIterator, Callable
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from prisma import Prisma
+from app.config import settings
+from app.core.deps import get_db
+from app.core.feeds import (
+    atom_feed,
+    feed_cache,
+    rss_feed,
+    sitemap_index,
+    sitemap_shards,
+    sitemap_urlset
+)
+
+router = APIRouter(tags=["Feeds"])
+
+
+async def _decompress(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(31)
+    async for chunk in chunks:
+        yield decompressor.decompress(chunk)
+    yield decompressor.flush()
+
+
+async def _serve(
+    request: Request,
+    db: Prisma,
+    key: str,
+    media_type: str,
+    build: Callable[[], AsyncIterator[bytes]]
+) -> Response:
+    """Serve a cached (gzip) document, or stream and cache it; honours If-Modified-Since"""
+    document = feed_cache.get(key)
+    last_modified = document.last_modified if document else await feed_cache.last_modified(db)
+    headers = {
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={settings.FEED_CACHE_TTL_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+
+    since = request.headers.get("if-modified-since")
+    if since:
+        try:
+            if last_modified <= parsedate_to_datetime(since):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    if accepts_gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    if document:
+        body = document.body if accepts_gzip else gzip.decompress(document.body)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    stream = feed_cache.compress(key, build(), last_modified)
+    return StreamingResponse(
+        stream if accepts_gzip else _decompress(stream),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+async def _sitemap(db: Prisma) -> AsyncIterator[bytes]:
+    shards = await sitemap_shards(db)
+    document = sitemap_urlset(db) if len(shards) == 1 else sitemap_index(shards)
+    async for chunk in document:
+        yield chunk
+
+
+async def _posts_sitemap(db: Prisma, shard: int) -> AsyncIterator[bytes]:
+    shards = await sitemap_shards(db)
+    end_id = shards[shard + 1] if shard + 1 < len(shards) else None
+    async for chunk in sitemap_urlset(db, categories=False, start_id=shards[shard], end_id=end_id):
+        yield chunk
+
+
+@router.get("/sitemap.xml")
+async def get_sitemap(
+    request: Request,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Sitemap of published posts and categories (a sitemap index above 50k URLs)"""
+    return await _serve(request, db, "sitemap", "application/xml", lambda: _sitemap(db))
+
+
+@router.get("/sitemaps/categories.xml")
+async def get_categories_sitemap(
+    request: Request,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Sitemap shard with the blog categories"""
+    return await _serve(
+        request, db, "sitemap:categories", "application/xml",
+        lambda: sitemap_urlset(db, posts=False)
+    )
+
+
+@router.get("/sitemaps/posts-{shard}.xml")
+async def get_posts_sitemap(
+    shard: int,
+    request: Request,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Sitemap shard with up to 50k published posts"""
+    key = f"sitemap:posts:{shard}"
+    if feed_cache.get(key) is None and not 0 <= shard < len(await sitemap_shards(db)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sitemap not found"
+        )
+    return await _serve(request, db, key, "application/xml", lambda: _posts_sitemap(db, shard))
+
+
+@router.get("/feed.xml")
+async def get_rss_feed(
+    request: Request,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """RSS 2.0 feed of the latest published posts"""
+    return await _serve(request, db, "rss", "application/rss+xml", lambda: rss_feed(db))
+
+
+@router.get("/atom.xml")
+async def get_atom_feed(
+    request: Request,
+    db: Annotated[Prisma, Depends(get_db)]
+):
+    """Atom feed of the latest published posts"""
+    return await _serve(request, db, "atom", "application/atom+xml", lambda: atom_feed(db))
@@ -1,10 +1,27 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from prisma import Prisma
 from prisma.models import User
-from app.core.deps import get_db, get_current_user, require_permission, require_role
+from app.core.loaders import LoaderRegistry
+from app.core.deps import get_db, get_loaders, get_current_user, require_permission, require_role
 from app.core.permissions import Permission, UserRole
-from app.schemas.lawyer import LawyerProfileCreate, LawyerProfileUpdate, LawyerProfileResponse
+from app.core.pagination import Page, paginate, paginated
+from app.core.stats import stats_cache
+from app.core.expand import LAWYER_RELATIONS, expand_param, expand_relations
+from app.core.facets import ExperienceBucket, experience_range, lawyer_facets
+from app.core.specializations import (
+    normalize_specializations,
+    specialization_index,
+    specialization_slug,
+    sync_profile_specializations
+)
+from app.schemas.lawyer import (
+    LawyerProfileCreate,
+    LawyerProfileUpdate,
+    LawyerProfileResponse,
+    LawyerSearchResponse,
+    SpecializationTagResponse
+)
 
 router = APIRouter(prefix="/lawyers", tags=["Lawyers"])
 
@@ -39,6 +56,9 @@ async def create_lawyer_profile(
             "longitude": profile_data.longitude,
         }
     )
+    stats_cache.lawyer_created()
+    lawyer_facets.profile_added(profile)
+    await sync_profile_specializations(db, profile.id, profile.specialization)
 
     return profile
 
@@ -80,6 +100,9 @@ async def update_my_lawyer_profile(
         where={"userId": current_user.id},
         data=update_data
     )
+    lawyer_facets.profile_changed(existing_profile, updated_profile)
+    if "specialization" in update_data:
+        await sync_profile_specializations(db, updated_profile.id, updated_profile.specialization)
 
     return updated_profile
 
@@ -88,28 +111,98 @@ async def update_my_lawyer_profile(
 async def get_all_lawyers(
     current_user: Annotated[User, Depends(require_permission(Permission.VIEW_LAWYER_PROFILES))],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 100,
+    page: Annotated[Page, Depends(paginate(100))],
+    response: Response,
+    expand: Annotated[frozenset[str], Depends(expand_param(*LAWYER_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)],
     verified_only: bool = False
 ):
     """Get all lawyer profiles (with pagination)"""
     where_clause = {"isVerified": True} if verified_only else {}
 
+    return await paginated(
+        db, db.lawyerprofile, "lawyer_profiles", page, response, LawyerProfileResponse,
+        order=[{"createdAt": "desc"}, {"id": "desc"}],
+        where=where_clause,
+        transform=lambda rows: expand_relations(loaders, rows, LAWYER_RELATIONS, expand)
+    )
+
+
+@router.get("/search", response_model=LawyerSearchResponse)
+async def search_lawyers(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_LAWYER_PROFILES))],
+    db: Annotated[Prisma, Depends(get_db)],
+    page: Annotated[Page, Depends(paginate(20, streamable=False))],
+    expand: Annotated[frozenset[str], Depends(expand_param(*LAWYER_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)],
+    specialization: Optional[str] = None,
+    experience: Optional[ExperienceBucket] = None,
+    verified: Optional[bool] = None
+):
+    """Faceted lawyer directory: filtered profiles plus cached counts per facet value (specialization by tag)"""
+    where_clause = {}
+    if specialization is not None:
+        specialization = specialization_slug(specialization)
+        where_clause["specializations"] = {"some": {"tag": {"is": {"slug": specialization}}}}
+    if experience is not None:
+        low, high = experience_range(experience)
+        where_clause["experienceYears"] = {"gte": low, **({"lte": high} if high is not None else {})}
+    if verified is not None:
+        where_clause["isVerified"] = verified
+
     profiles = await db.lawyerprofile.find_many(
         where=where_clause,
-        skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+        skip=page.skip,
+        take=page.limit,
+        order=[{"createdAt": "desc"}, {"id": "desc"}]
     )
+    await expand_relations(loaders, profiles, LAWYER_RELATIONS, expand)
+    total, facets = lawyer_facets.facets(specialization, experience, verified)
+
+    return {"total": total, "results": profiles, "facets": facets}
+
 
-    return profiles
+@router.get("/specializations", response_model=list[SpecializationTagResponse])
+async def get_specializations(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_LAWYER_PROFILES))]
+):
+    """Get all specialization tags with their profile counts"""
+    return specialization_index.tags()
+
+
+@router.get("/match", response_model=list[LawyerProfileResponse])
+async def match_lawyers(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_LAWYER_PROFILES))],
+    db: Annotated[Prisma, Depends(get_db)],
+    page: Annotated[Page, Depends(paginate(20, streamable=False))],
+    response: Response,
+    tags: Annotated[list[str], Query(min_length=1)],
+    expand: Annotated[frozenset[str], Depends(expand_param(*LAWYER_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)],
+    mode: Literal["all", "any"] = "all"
+):
+    """Get lawyers tagged with all (AND) or any (OR) of the given specializations"""
+    slugs = [slug for tag in tags for slug, _ in normalize_specializations(tag)]
+    ids = sorted(specialization_index.match(slugs, match_all=mode == "all"), reverse=True)
+    response.headers["X-Total-Count"] = str(len(ids))
+
+    page_ids = ids[page.skip:page.skip + page.limit]
+    if not page_ids:
+        return []
+    profiles = await db.lawyerprofile.find_many(
+        where={"id": {"in": page_ids}},
+        order={"id": "desc"}
+    )
+    return await expand_relations(loaders, profiles, LAWYER_RELATIONS, expand)
 
 
 @router.get("/{lawyer_id}", response_model=LawyerProfileResponse)
 async def get_lawyer_by_id(
     lawyer_id: int,
     current_user: Annotated[User, Depends(require_permission(Permission.VIEW_LAWYER_PROFILES))],
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    expand: Annotated[frozenset[str], Depends(expand_param(*LAWYER_RELATIONS))],
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ):
     """Get lawyer profile by ID"""
     profile = await db.lawyerprofile.find_unique(where={"id": lawyer_id})
@@ -119,4 +212,5 @@ async def get_lawyer_by_id(
             detail="Lawyer profile not found"
         )
 
+    await expand_relations(loaders, [profile], LAWYER_RELATIONS, expand)
     return profile
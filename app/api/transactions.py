@@ -1,16 +1,27 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from prisma import Prisma
 from prisma.models import User
 from app.core.deps import get_db, get_current_user, require_permission
 from app.core.permissions import Permission
+from app.core.pagination import Page, paginate, paginated
+from app.core.stats import stats_cache
+from app.core.ledger import settle_transaction
+from app.core.idempotency import idempotency_store, request_fingerprint
+from app.core.analytics import record_transaction_change, query_daily_rollups, query_user_rollups
 from app.schemas.transaction import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
-    TransactionStatus
+    TransactionStatus,
+    TransactionType,
+    CreditLedgerEntryResponse,
+    AnalyticsInterval,
+    TransactionAnalyticsBucket,
+    UserTransactionTotals
 )
-from decimal import Decimal
+from datetime import date, datetime
+from typing import Optional
 import uuid
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
@@ -20,43 +31,125 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 async def create_transaction(
     transaction_data: TransactionCreate,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)] = None
 ):
-    """Create a new transaction"""
-    # Generate unique reference ID
-    reference_id = f"TXN-{uuid.uuid4().hex[:12].upper()}"
-
-    # Create transaction
-    transaction = await db.transaction.create(
-        data={
-            "userId": current_user.id,
-            "amount": transaction_data.amount,
-            "type": transaction_data.type,
-            "description": transaction_data.description,
-            "referenceId": reference_id,
-            "status": TransactionStatus.PENDING.value,
-        }
-    )
+    """Create a new transaction (retries with the same Idempotency-Key replay the first response)"""
+    async def create():
+        # Generate unique reference ID
+        reference_id = f"TXN-{uuid.uuid4().hex[:12].upper()}"
 
-    return transaction
+        # Create transaction and count it in the analytics rollups
+        async with db.tx() as tx:
+            transaction = await tx.transaction.create(
+                data={
+                    "userId": current_user.id,
+                    "amount": transaction_data.amount,
+                    "type": transaction_data.type,
+                    "description": transaction_data.description,
+                    "referenceId": reference_id,
+                    "status": TransactionStatus.PENDING.value,
+                }
+            )
+            await record_transaction_change(tx, transaction, None, transaction.status)
+        stats_cache.transaction_status_changed(None, transaction.status)
+
+        return transaction
+
+    if idempotency_key:
+        return await idempotency_store.run(
+            db,
+            f"user:{current_user.id}:create-transaction:{idempotency_key}",
+            request_fingerprint(transaction_data.model_dump(mode="json")),
+            create,
+            TransactionResponse,
+            status.HTTP_201_CREATED,
+        )
+
+    return await create()
 
 
 @router.get("/my-transactions", response_model=list[TransactionResponse])
 async def get_my_transactions(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 50
+    page: Annotated[Page, Depends(paginate(50))],
+    response: Response
 ):
     """Get current user's transactions"""
-    transactions = await db.transaction.find_many(
-        where={"userId": current_user.id},
-        skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+    return await paginated(
+        db, db.transaction, "transactions", page, response, TransactionResponse,
+        order=[{"createdAt": "desc"}, {"id": "desc"}],
+        where={"userId": current_user.id}
+    )
+
+
+@router.get("/balance-history", response_model=list[CreditLedgerEntryResponse])
+async def get_balance_history(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[Prisma, Depends(get_db)],
+    page: Annotated[Page, Depends(paginate(100))],
+    response: Response,
+    from_: Annotated[Optional[datetime], Query(alias="from")] = None,
+    to: Optional[datetime] = None
+):
+    """Get current user's credit balance history from the ledger"""
+    created_at = {}
+    if from_:
+        created_at["gte"] = from_
+    if to:
+        created_at["lt"] = to
+
+    where_clause = {"userId": current_user.id}
+    if created_at:
+        where_clause["createdAt"] = created_at
+
+    return await paginated(
+        db, db.creditledgerentry, "credit_ledger", page, response, CreditLedgerEntryResponse,
+        order=[{"createdAt": "asc"}, {"id": "asc"}],
+        where=where_clause
+    )
+
+
+@router.get("/analytics", response_model=list[TransactionAnalyticsBucket])
+async def get_transaction_analytics(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))],
+    db: Annotated[Prisma, Depends(get_db)],
+    from_: Annotated[Optional[date], Query(alias="from")] = None,
+    to: Optional[date] = None,
+    interval: AnalyticsInterval = AnalyticsInterval.DAY,
+    type: Optional[TransactionType] = None,
+    status_filter: Annotated[Optional[TransactionStatus], Query(alias="status")] = None
+):
+    """Get transaction volume per day or week from the daily rollups (admin only)"""
+    return await query_daily_rollups(
+        db,
+        date_from=from_,
+        date_to=to,
+        interval=interval.value,
+        type=type.value if type else None,
+        status=status_filter.value if status_filter else None,
     )
 
-    return transactions
+
+@router.get("/analytics/users", response_model=list[UserTransactionTotals])
+async def get_user_transaction_analytics(
+    current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))],
+    db: Annotated[Prisma, Depends(get_db)],
+    page: Annotated[Page, Depends(paginate(100))],
+    user_id: Optional[int] = None,
+    type: Optional[TransactionType] = None,
+    status_filter: Annotated[Optional[TransactionStatus], Query(alias="status")] = None
+):
+    """Get per-user transaction totals, largest amount first (admin only)"""
+    return await query_user_rollups(
+        db,
+        user_id=user_id,
+        type=type.value if type else None,
+        status=status_filter.value if status_filter else None,
+        skip=page.skip,
+        limit=min(page.limit, page.max_limit),
+    )
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
@@ -88,54 +181,43 @@ async def get_transaction_by_id(
 async def complete_transaction(
     transaction_id: int,
     current_user: Annotated[User, Depends(require_permission(Permission.MANAGE_TRANSACTIONS))],
-    db: Annotated[Prisma, Depends(get_db)]
+    db: Annotated[Prisma, Depends(get_db)],
+    idempotency_key: Annotated[Optional[str], Header(alias="Idempotency-Key", max_length=255)] = None
 ):
     """Complete a transaction (admin only)"""
-    transaction = await db.transaction.find_unique(where={"id": transaction_id})
-
-    if not transaction:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transaction not found"
-        )
+    async def complete():
+        transaction = await db.transaction.find_unique(where={"id": transaction_id})
 
-    if transaction.status != TransactionStatus.PENDING.value:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot complete transaction with status: {transaction.status}"
-        )
-
-    # Update user credit based on transaction type
-    user = await db.user.find_unique(where={"id": transaction.userId})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+        if not transaction:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transaction not found"
+            )
 
-    new_credit = user.credit
-    if transaction.type == "DEPOSIT" or transaction.type == "REFUND":
-        new_credit += transaction.amount
-    elif transaction.type == "WITHDRAW" or transaction.type == "PAYMENT":
-        new_credit -= transaction.amount
-        if new_credit < 0:
+        if transaction.status != TransactionStatus.PENDING.value:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient credit"
+                detail=f"Cannot complete transaction with status: {transaction.status}"
             )
 
-    # Update user credit and transaction status
-    await db.user.update(
-        where={"id": transaction.userId},
-        data={"credit": new_credit}
-    )
+        # Update user credit, transaction status and ledger atomically
+        await settle_transaction(db, transaction, TransactionStatus.COMPLETED.value)
 
-    updated_transaction = await db.transaction.update(
-        where={"id": transaction_id},
-        data={"status": TransactionStatus.COMPLETED.value}
-    )
+        updated_transaction = await db.transaction.find_unique(where={"id": transaction_id})
+        stats_cache.transaction_status_changed(transaction.status, updated_transaction.status)
 
-    return updated_transaction
+        return updated_transaction
+
+    if idempotency_key:
+        return await idempotency_store.run(
+            db,
+            f"user:{current_user.id}:complete-transaction:{idempotency_key}",
+            request_fingerprint(transaction_id),
+            complete,
+            TransactionResponse,
+        )
+
+    return await complete()
 
 
 @router.patch("/{transaction_id}", response_model=TransactionResponse)
@@ -156,10 +238,16 @@ async def update_transaction(
 
     update_data = transaction_update.model_dump(exclude_unset=True)
 
-    updated_transaction = await db.transaction.update(
-        where={"id": transaction_id},
-        data=update_data
-    )
+    async with db.tx() as tx:
+        updated_transaction = await tx.transaction.update(
+            where={"id": transaction_id},
+            data=update_data
+        )
+        if updated_transaction.status != transaction.status:
+            await record_transaction_change(tx, transaction, transaction.status, updated_transaction.status)
+
+    if updated_transaction.status != transaction.status:
+        stats_cache.transaction_status_changed(transaction.status, updated_transaction.status)
 
     return updated_transaction
 
@@ -168,14 +256,11 @@ async def update_transaction(
 async def get_all_transactions(
     current_user: Annotated[User, Depends(require_permission(Permission.VIEW_ALL_DATA))],
     db: Annotated[Prisma, Depends(get_db)],
-    skip: int = 0,
-    limit: int = 100
+    page: Annotated[Page, Depends(paginate(100))],
+    response: Response
 ):
     """Get all transactions (admin only)"""
-    transactions = await db.transaction.find_many(
-        skip=skip,
-        take=limit,
-        order={"createdAt": "desc"}
+    return await paginated(
+        db, db.transaction, "transactions", page, response, TransactionResponse,
+        order=[{"createdAt": "desc"}, {"id": "desc"}]
     )
-
-    return transactions
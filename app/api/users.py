@@ -1,4 +1,5 @@
 from typing import Annotated
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends
 from prisma import Prisma
 from prisma.models import User
@@ -37,4 +38,11 @@ async def update_current_user_profile(
         data=update_data
     )
 
+    # A password change signs out every other session
+    if "password" in update_data:
+        await db.refreshtoken.update_many(
+            where={"userId": current_user.id, "revokedAt": None},
+            data={"revokedAt": datetime.now(timezone.utc)}
+        )
+
     return updated_user
@@ -17,6 +17,79 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Max number of verified tokens kept in memory (0 disables the cache)
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Password hashing (calibrate with `python -m app.core.calibrate`)
+    BCRYPT_ROUNDS: int = 12
+
+    # Rate limiting ("memory" per process, or "postgres" shared by all workers)
+    RATE_LIMIT_STORE: str = "memory"
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_EMAIL_IP: int = 5
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 30  # across all IPs
+
+    # Admission control: global in-flight cap and per router tag token buckets.
+    # Each tag may set route_rate/route_burst (whole tag) and user_rate/user_burst
+    # (per user, or per IP when anonymous), in requests per second.
+    MAX_IN_FLIGHT_REQUESTS: int = 64
+    ADMISSION_QUEUE_SIZE: int = 128
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_LIMITS: str | dict = (
+        '{"Admin": {"user_rate": 2, "user_burst": 10},'
+        ' "Transactions": {"user_rate": 5, "user_burst": 20},'
+        ' "AI Chats": {"user_rate": 5, "user_burst": 20}}'
+    )
+
+    # Pagination: default per-route cap on `limit` (larger requests are streamed)
+    MAX_PAGE_SIZE: int = 100
+    COUNT_CACHE_TTL_SECONDS: int = 30
+
+    # Admin dashboard stats refresh interval
+    STATS_REFRESH_SECONDS: int = 300
+
+    # Lawyer facet counts reload interval (picks up writes made by other workers)
+    FACETS_REFRESH_SECONDS: int = 60
+
+    # Specialization index reload interval (picks up writes made by other workers)
+    SPECIALIZATION_INDEX_REFRESH_SECONDS: int = 60
+
+    # Idempotency-Key support
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # Lease on an in-flight key; after it lapses a retry may take the key over
+    IDEMPOTENCY_LOCK_SECONDS: float = 30.0
+
+    # Background jobs
+    JOB_DRAIN_TIMEOUT_SECONDS: float = 10.0
+    DURABLE_JOBS_ENABLED: bool = False
+    DURABLE_JOB_POLL_SECONDS: float = 1.0
+    DURABLE_JOB_LOCK_TIMEOUT_SECONDS: int = 300
+
+    # User purge after soft delete
+    PURGE_BATCH_SIZE: int = 1000
+    PURGE_PAUSE_SECONDS: float = 0.1
+    # A running purge without progress for this long is taken over; failed ones retry up to the cap
+    PURGE_LOCK_TIMEOUT_SECONDS: int = 300
+    PURGE_MAX_ATTEMPTS: int = 5
+
+    # Sitemap and feeds: public site base URL for links (the site is expected to proxy
+    # /sitemap.xml, /sitemaps/*, /feed.xml and /atom.xml here), cache lifetime per worker
+    SITE_URL: str = "http://localhost:3000"
+    FEED_CACHE_TTL_SECONDS: int = 300
+    FEED_SIZE: int = 50
+
+    # Trending posts: score half-life, ranked posts kept per category, persist interval
+    TRENDING_HALF_LIFE_HOURS: float = 24.0
+    TRENDING_TOP_K: int = 100
+    TRENDING_PERSIST_SECONDS: int = 60
+
+    # Response compression: smallest body worth compressing, memory for compressed public responses
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
 
     # CORS - accepts both string (JSON array) and list format
     ALLOWED_ORIGINS: str | list[str] = '["http://localhost:3000"]'
@@ -37,5 +110,12 @@ class Settings(BaseSettings):
                 return [self.ALLOWED_ORIGINS]
         return self.ALLOWED_ORIGINS
 
+    @property
+    def admission_limits(self) -> dict[str, dict[str, float]]:
+        """Parse ADMISSION_LIMITS if it's a string, otherwise return as-is"""
+        if isinstance(self.ADMISSION_LIMITS, str):
+            return json.loads(self.ADMISSION_LIMITS)
+        return self.ADMISSION_LIMITS
+
 
 settings = Settings()
@@ -0,0 +1,195 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+from fastapi.responses import JSONResponse
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.core.security import decode_access_token
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` stored"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> Optional[float]:
+        """Take one token; return seconds until one is available if empty, else None"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-tag rate limits plus a global in-flight cap with a bounded wait queue"""
+
+    def __init__(
+        self,
+        limits: dict[str, dict[str, float]],
+        max_in_flight: int,
+        queue_size: int,
+        queue_timeout: float,
+        max_user_buckets: int = 100_000,
+    ):
+        self.limits = limits
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_user_buckets = max_user_buckets
+
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        self._in_flight = 0
+        self._route_buckets: dict[str, TokenBucket] = {}
+        self._user_buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def check_rate(self, tag: str, client: str) -> Optional[float]:
+        """Apply the tag's route-wide and per-client buckets; return retry-after if limited"""
+        limit = self.limits.get(tag)
+        if not limit:
+            return None
+
+        if "route_rate" in limit:
+            bucket = self._route_buckets.get(tag)
+            if bucket is None:
+                bucket = TokenBucket(limit["route_rate"], limit.get("route_burst", limit["route_rate"]))
+                self._route_buckets[tag] = bucket
+            wait = bucket.take()
+            if wait is not None:
+                return wait
+
+        if "user_rate" in limit:
+            key = (tag, client)
+            bucket = self._user_buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(limit["user_rate"], limit.get("user_burst", limit["user_rate"]))
+                self._user_buckets[key] = bucket
+                if len(self._user_buckets) > self.max_user_buckets:
+                    self._user_buckets.popitem(last=False)
+            else:
+                self._user_buckets.move_to_end(key)
+            return bucket.take()
+
+        return None
+
+    async def acquire(self) -> bool:
+        """Take an in-flight slot, queueing up to queue_timeout; False means shed"""
+        if self._slots.locked():
+            if self._waiting >= self.queue_size:
+                return False
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self._waiting -= 1
+        else:
+            await self._slots.acquire()
+
+        self._in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+
+    def record(self, tag: str, outcome: str) -> None:
+        self._counters[tag][outcome] += 1
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._waiting,
+            "max_in_flight": self.max_in_flight,
+            "queue_size": self.queue_size,
+            "by_tag": {tag: dict(counts) for tag, counts in self._counters.items()},
+        }
+
+
+admission_controller = AdmissionController(
+    limits=settings.admission_limits,
+    max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS,
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+class AdmissionControlMiddleware:
+    """Rate-limit and cap concurrency for tagged API routes (untagged ones like /health pass through)"""
+
+    def __init__(self, app: ASGIApp, router: Router, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.router = router
+        self.controller = controller
+
+    def _route_tag(self, scope: Scope) -> Optional[str]:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                tags = getattr(route, "tags", None)
+                return tags[0] if tags else None
+        return None
+
+    @staticmethod
+    def _client_key(scope: Scope) -> str:
+        # Prefer the authenticated user; decoding is a cache hit for known tokens
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    payload = decode_access_token(token)
+                    if payload and payload.get("sub"):
+                        return f"user:{payload['sub']}"
+                break
+        client = scope.get("client")
+        return f"ip:{client[0]}" if client else "ip:unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tag = self._route_tag(scope)
+        if tag is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.controller.check_rate(tag, self._client_key(scope))
+        if retry_after is not None:
+            self.controller.record(tag, "rate_limited")
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            self.controller.record(tag, "shed")
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(self.controller.queue_timeout)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.controller.record(tag, "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,161 @@
+"""
+Transaction rollups for analytics.
+
+Rollup rows are adjusted whenever a transaction is created or changes
+status, so analytics queries only read the (small) rollup tables.
+Backfill or repair them from the transactions table with:
+python -m app.core.analytics --rebuild
+"""
+import argparse
+import asyncio
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from prisma import Prisma
+from prisma.models import Transaction, UserTransactionRollup
+
+_UPSERT_DAILY = """
+    INSERT INTO transaction_daily_rollups (day, type, status, count, amount)
+    VALUES ($1::date, $2::"TransactionType", $3::"TransactionStatus", $4, $5::numeric)
+    ON CONFLICT (day, type, status) DO UPDATE SET
+        count = transaction_daily_rollups.count + EXCLUDED.count,
+        amount = transaction_daily_rollups.amount + EXCLUDED.amount
+"""
+
+_UPSERT_USER = """
+    INSERT INTO user_transaction_rollups (user_id, type, status, count, amount)
+    VALUES ($1, $2::"TransactionType", $3::"TransactionStatus", $4, $5::numeric)
+    ON CONFLICT (user_id, type, status) DO UPDATE SET
+        count = user_transaction_rollups.count + EXCLUDED.count,
+        amount = user_transaction_rollups.amount + EXCLUDED.amount
+"""
+
+
+def _value(enum_or_str) -> str:
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+async def record_transaction_change(
+    db: Prisma,
+    transaction: Transaction,
+    old_status: Optional[str],
+    new_status: Optional[str],
+) -> None:
+    """Move a transaction between status buckets (None for created/deleted)"""
+    day = transaction.createdAt.date().isoformat()
+    type = _value(transaction.type)
+
+    for status, sign in ((old_status, -1), (new_status, 1)):
+        if status is None:
+            continue
+        signed_amount = str(transaction.amount * sign)
+        await db.execute_raw(_UPSERT_DAILY, day, type, _value(status), sign, signed_amount)
+        await db.execute_raw(_UPSERT_USER, transaction.userId, type, _value(status), sign, signed_amount)
+
+
+async def query_daily_rollups(
+    db: Prisma,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    interval: str,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+) -> list[dict]:
+    """Volume per period (day or week), type and status, from the rollup table"""
+    filters = []
+    params: list = [interval]
+    if date_from:
+        params.append(date_from.isoformat())
+        filters.append(f"day >= ${len(params)}::date")
+    if date_to:
+        params.append(date_to.isoformat())
+        filters.append(f"day < ${len(params)}::date")
+    if type:
+        params.append(type)
+        filters.append(f'type = ${len(params)}::"TransactionType"')
+    if status:
+        params.append(status)
+        filters.append(f'status = ${len(params)}::"TransactionStatus"')
+
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    rows = await db.query_raw(
+        f"""
+        SELECT date_trunc($1, day)::date AS period, type::text AS type, status::text AS status,
+               SUM(count)::int AS count, SUM(amount)::text AS amount
+        FROM transaction_daily_rollups
+        {where}
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+        """,
+        *params,
+    )
+    return [{**row, "amount": Decimal(row["amount"])} for row in rows]
+
+
+async def query_user_rollups(
+    db: Prisma,
+    user_id: Optional[int] = None,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> list[UserTransactionRollup]:
+    """Per-user totals, largest amount first"""
+    where = {}
+    if user_id is not None:
+        where["userId"] = user_id
+    if type:
+        where["type"] = type
+    if status:
+        where["status"] = status
+
+    return await db.usertransactionrollup.find_many(
+        where=where or None,
+        skip=skip,
+        take=limit,
+        order=[{"amount": "desc"}, {"userId": "asc"}]
+    )
+
+
+async def rebuild_rollups(db: Prisma) -> None:
+    """Recompute both rollup tables from the transactions table"""
+    async with db.tx() as tx:
+        await tx.execute_raw("DELETE FROM transaction_daily_rollups")
+        await tx.execute_raw(
+            """
+            INSERT INTO transaction_daily_rollups (day, type, status, count, amount)
+            SELECT created_at::date, type, status, COUNT(*), SUM(amount)
+            FROM transactions
+            GROUP BY 1, 2, 3
+            """
+        )
+        await tx.execute_raw("DELETE FROM user_transaction_rollups")
+        await tx.execute_raw(
+            """
+            INSERT INTO user_transaction_rollups (user_id, type, status, count, amount)
+            SELECT user_id, type, status, COUNT(*), SUM(amount)
+            FROM transactions
+            GROUP BY 1, 2, 3
+            """
+        )
+
+
+async def _main() -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    await connect_db()
+    try:
+        await rebuild_rollups(db)
+    finally:
+        await disconnect_db()
+    print("✅ Transaction rollups rebuilt")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain transaction analytics rollups")
+    parser.add_argument("--rebuild", action="store_true", help="recompute rollups from all transactions")
+    args = parser.parse_args()
+    if args.rebuild:
+        asyncio.run(_main())
+    else:
+        parser.print_help()
@@ -0,0 +1,49 @@
+"""
+Pick the bcrypt cost for this machine.
+
+Usage: python -m app.core.calibrate [--target-ms 250] [--samples 3]
+"""
+import argparse
+import time
+from passlib.hash import bcrypt
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+
+def measure_hash_ms(rounds: int, samples: int = 3) -> float:
+    """Median time in milliseconds to hash a password with the given cost"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.using(rounds=rounds).hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def calibrate_bcrypt_rounds(target_ms: float, samples: int = 3) -> int:
+    """Highest cost whose hash time stays within target_ms (never below MIN_ROUNDS)"""
+    best = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure_hash_ms(rounds, samples)
+        print(f"  rounds={rounds:2}  {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = rounds
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate bcrypt cost for this machine")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="target hash latency in ms")
+    parser.add_argument("--samples", type=int, default=3, help="hashes per cost level")
+    args = parser.parse_args()
+
+    print(f"🔍 Measuring bcrypt cost (target {args.target_ms:.0f} ms)...")
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.samples)
+    print(f"\n✅ Recommended setting: BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Response compression negotiated from Accept-Encoding (zstd, br or gzip).
+
+Bodies under COMPRESSION_MIN_SIZE, compressed media types and responses that
+already carry a Content-Encoding (the feeds) pass through untouched. Streamed
+bodies are compressed chunk by chunk and flushed, so clients still receive
+data as it is produced.
+
+Complete bodies of public responses (no Authorization header, not marked
+private or no-store) are kept compressed in an LRU keyed by a hash of the
+uncompressed bytes: a hot list rendered to the same JSON is hashed, not
+recompressed, and a changed body simply misses.
+"""
+import hashlib
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Callable, Optional, Protocol
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+
+
+class StreamEncoder(Protocol):
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it, so the client can decode what was sent so far"""
+        ...
+
+    def finish(self) -> bytes:
+        ...
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _gzip(data: bytes) -> bytes:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+# Encoding -> (one-shot compress, stream encoder), in server preference order
+ENCODERS: dict[str, tuple[Callable[[bytes], bytes], Callable[[], StreamEncoder]]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = (zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress, _ZstdStream)
+if brotli is not None:
+    ENCODERS["br"] = (lambda data: brotli.compress(data, quality=BROTLI_QUALITY), _BrotliStream)
+ENCODERS["gzip"] = (_gzip, _GzipStream)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best available encoding for an Accept-Encoding header: highest q, then server preference"""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODERS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+class ResponseCompressor:
+    """Compresses bodies, caching compressed public ones; keeps byte counters"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cache: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+        self._cached_bytes = 0
+        self._counters: dict[str, int] = defaultdict(int)
+
+    def compress(self, body: bytes, encoding: str, cacheable: bool) -> bytes:
+        self._counters[f"responses_{encoding}"] += 1
+        self._counters["bytes_in"] += len(body)
+        if not cacheable:
+            compressed = ENCODERS[encoding][0](body)
+            self._counters["bytes_out"] += len(compressed)
+            return compressed
+
+        key = (encoding, hashlib.sha256(body).digest())
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            self._counters["cache_hits"] += 1
+        else:
+            self._counters["cache_misses"] += 1
+            compressed = ENCODERS[encoding][0](body)
+            self._store(key, compressed)
+        self._counters["bytes_out"] += len(compressed)
+        return compressed
+
+    def stream(self, encoding: str) -> StreamEncoder:
+        self._counters[f"responses_{encoding}"] += 1
+        self._counters["streamed"] += 1
+        return ENCODERS[encoding][1]()
+
+    def record_stream(self, bytes_in: int, bytes_out: int) -> None:
+        self._counters["bytes_in"] += bytes_in
+        self._counters["bytes_out"] += bytes_out
+
+    def _store(self, key: tuple[str, bytes], compressed: bytes) -> None:
+        # One response may not take over the whole cache
+        if len(compressed) > self.max_bytes // 8:
+            return
+        self._cache[key] = compressed
+        self._cached_bytes += len(compressed)
+        while self._cached_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
+
+    def metrics(self) -> dict:
+        bytes_in, bytes_out = self._counters["bytes_in"], self._counters["bytes_out"]
+        return {
+            **self._counters,
+            "bytes_saved": bytes_in - bytes_out,
+            "ratio": round(bytes_out / bytes_in, 3) if bytes_in else None,
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cached_bytes,
+            "encodings": list(ENCODERS),
+        }
+
+
+response_compressor = ResponseCompressor(settings.COMPRESSION_CACHE_MAX_BYTES)
+
+
+class _CompressingSender:
+    """Holds back the response start until the first body chunk decides whether to compress"""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int, public: bool):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.public = public
+        self.start: Optional[Message] = None
+        self.encoder: Optional[StreamEncoder] = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _eligible(self, headers: Headers) -> bool:
+        return (
+            self.start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+
+    def _cacheable(self, headers: Headers) -> bool:
+        cache_control = headers.get("cache-control", "").lower()
+        return (
+            self.public
+            and "set-cookie" not in headers
+            and "private" not in cache_control
+            and "no-store" not in cache_control
+        )
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is not None:
+            self.bytes_in += len(body)
+            chunk = self.encoder.compress(body) if body else b""
+            if not more_body:
+                chunk += self.encoder.finish()
+                self.bytes_out += len(chunk)
+                response_compressor.record_stream(self.bytes_in, self.bytes_out)
+            else:
+                self.bytes_out += len(chunk)
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        # First body chunk
+        headers = MutableHeaders(scope=self.start)
+        if not self._eligible(headers):
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+        headers.add_vary_header("Accept-Encoding")
+
+        if not more_body and len(body) < self.minimum_size:
+            self.passthrough = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            del headers["Content-Length"]
+            self.encoder = response_compressor.stream(self.encoding)
+            self.bytes_in = len(body)
+            chunk = self.encoder.compress(body)
+            self.bytes_out = len(chunk)
+        else:
+            chunk = response_compressor.compress(body, self.encoding, self._cacheable(headers))
+            headers["Content-Length"] = str(len(chunk))
+
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing eligible HTTP responses with the client's
+    preferred supported encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        public = scope["method"] == "GET" and "authorization" not in headers
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size, public))
@@ -0,0 +1,92 @@
+"""
+Blog post rendering: Markdown to sanitized HTML, plus derived excerpt, word
+count and reading time. Done once per write instead of on every page view.
+
+Render posts written before these columns existed with:
+python -m app.core.content --backfill
+"""
+import argparse
+import asyncio
+import html
+import re
+import markdown
+import nh3
+from prisma import Prisma
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+BACKFILL_BATCH_SIZE = 500
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Markdown instances are stateful; reset() before each conversion
+_markdown = markdown.Markdown(extensions=["fenced_code", "tables", "sane_lists"])
+
+
+def render_html(content: str) -> str:
+    """Markdown to HTML with anything outside the nh3 allow-list stripped"""
+    return nh3.clean(_markdown.reset().convert(content))
+
+
+def plain_text(rendered: str) -> str:
+    return _WHITESPACE.sub(" ", html.unescape(nh3.clean(rendered, tags=set()))).strip()
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """First `length` characters of text, cut at a word boundary"""
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return cut.rstrip(" ,;:.،") + "…"
+
+
+def render_post_fields(content: str) -> dict:
+    """Column values derived from a post's Markdown content"""
+    rendered = render_html(content)
+    text = plain_text(rendered)
+    words = len(text.split())
+    return {
+        "contentHtml": rendered,
+        "autoExcerpt": make_excerpt(text) or None,
+        "wordCount": words,
+        "readingMinutes": max(1, -(-words // WORDS_PER_MINUTE)) if words else 0,
+    }
+
+
+async def backfill_rendered_posts(db: Prisma, only_missing: bool = True) -> int:
+    """Render posts in id-ordered batches; returns the number of posts updated"""
+    done = 0
+    last_id = 0
+    while True:
+        where: dict = {"id": {"gt": last_id}}
+        if only_missing:
+            where["contentHtml"] = None
+        posts = await db.blogpost.find_many(where=where, take=BACKFILL_BATCH_SIZE, order={"id": "asc"})
+        if not posts:
+            return done
+        for post in posts:
+            await db.blogpost.update(where={"id": post.id}, data=render_post_fields(post.content))
+        done += len(posts)
+        last_id = posts[-1].id
+
+
+async def _main(only_missing: bool) -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    await connect_db()
+    try:
+        done = await backfill_rendered_posts(db, only_missing)
+    finally:
+        await disconnect_db()
+    print(f"✅ Rendered {done} blog posts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render blog post content")
+    parser.add_argument("--backfill", action="store_true", help="render posts that have no stored HTML")
+    parser.add_argument("--all", action="store_true", help="with --backfill, re-render every post")
+    args = parser.parse_args()
+    if args.backfill:
+        asyncio.run(_main(only_missing=not args.all))
+    else:
+        parser.print_help()
@@ -1,10 +1,18 @@
-from typing import Annotated
+from functools import lru_cache
+from typing import Annotated, AsyncIterator
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from prisma import Prisma
 from prisma.models import User
 from app.core.security import decode_access_token
-from app.core.permissions import UserRole, Permission, has_permission
+from app.core.loaders import LoaderRegistry, loader_metrics
+from app.core.permissions import (
+    UserRole,
+    Permission,
+    permissions_mask,
+    has_all_permissions,
+    has_any_permission,
+)
 
 # Security scheme
 security = HTTPBearer()
@@ -16,9 +24,20 @@ async def get_db() -> Prisma:
     return db
 
 
+async def get_loaders(
+    db: Annotated[Prisma, Depends(get_db)]
+) -> AsyncIterator[LoaderRegistry]:
+    """Request-scoped batched loaders; shared by every dependency of one request"""
+    loaders = LoaderRegistry(db)
+    try:
+        yield loaders
+    finally:
+        loader_metrics.record(loaders)
+
+
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[Prisma, Depends(get_db)]
+    loaders: Annotated[LoaderRegistry, Depends(get_loaders)]
 ) -> User:
     """Get current authenticated user from JWT token"""
     token = credentials.credentials
@@ -51,7 +70,7 @@ async def get_current_user(
         )
 
     # Get user from database
-    user = await db.user.find_unique(where={"id": user_id})
+    user = await loaders.loader("user").load(user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -91,17 +110,46 @@ def require_role(*allowed_roles: UserRole):
     return role_checker
 
 
-def require_permission(permission: Permission):
-    """Dependency to require specific permission"""
+@lru_cache(maxsize=None)
+def _permission_checker(mask: int, require_all: bool, detail: str):
+    """Build (once per requirement) the dependency that enforces a permission mask"""
+    check = has_all_permissions if require_all else has_any_permission
+
     async def permission_checker(
         current_user: Annotated[User, Depends(get_current_user)]
     ) -> User:
-        user_role = UserRole(current_user.role)
-        if not has_permission(user_role, permission):
+        if not check(current_user.role, mask):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission denied: {permission.value}"
+                detail=detail
             )
         return current_user
 
     return permission_checker
+
+
+def require_permission(permission: Permission):
+    """Dependency to require specific permission"""
+    return _permission_checker(
+        permissions_mask([permission]), True, f"Permission denied: {permission.value}"
+    )
+
+
+def require_all_permissions(*permissions: Permission):
+    """Dependency to require every one of the given permissions"""
+    if len(permissions) == 1:
+        return require_permission(permissions[0])
+    values = ", ".join(sorted(p.value for p in permissions))
+    return _permission_checker(
+        permissions_mask(permissions), True, f"Permission denied: requires all of {values}"
+    )
+
+
+def require_any_permission(*permissions: Permission):
+    """Dependency to require at least one of the given permissions"""
+    if len(permissions) == 1:
+        return require_permission(permissions[0])
+    values = ", ".join(sorted(p.value for p in permissions))
+    return _permission_checker(
+        permissions_mask(permissions), False, f"Permission denied: requires any of {values}"
+    )
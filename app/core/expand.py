@@ -0,0 +1,66 @@
+import asyncio
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Iterable, Optional
+from fastapi import HTTPException, Query, status
+from app.core.loaders import LoaderRegistry
+
+
+@dataclass(frozen=True)
+class Relation:
+    """A to-one relation resolved from a foreign key column"""
+    foreign_key: str
+    model: str  # Prisma client attribute of the related model
+
+
+LAWYER_RELATIONS = {
+    "user": Relation("userId", "user"),
+}
+
+BLOG_POST_RELATIONS = {
+    "author": Relation("authorId", "user"),
+    "category": Relation("categoryId", "blogcategory"),
+}
+
+
+@lru_cache(maxsize=None)
+def expand_param(*allowed: str):
+    """Dependency for a comma-separated `expand` query param limited to `allowed` relations"""
+    async def expansion(
+        expand: Annotated[Optional[str], Query(description=f"Comma-separated: {', '.join(allowed)}")] = None
+    ) -> frozenset[str]:
+        names = frozenset(name.strip() for name in (expand or "").split(",") if name.strip())
+        unknown = names - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot expand: {', '.join(sorted(unknown))}"
+            )
+        return names
+
+    return expansion
+
+
+async def _load_relation(loaders: LoaderRegistry, rows: list, name: str, relation: Relation) -> None:
+    related = await loaders.loader(relation.model).load_many(
+        getattr(row, relation.foreign_key) for row in rows
+    )
+    for row, item in zip(rows, related):
+        setattr(row, name, item)
+
+
+async def expand_relations(
+    loaders: LoaderRegistry,
+    rows: Iterable,
+    relations: dict[str, Relation],
+    expand: Iterable[str],
+) -> list:
+    """
+    Attach the requested relations to rows. Loads go through the request's
+    loaders, so each related model costs at most one IN query (none for rows
+    already loaded in this request).
+    """
+    rows = [row for row in rows if row is not None]
+    if rows and expand:
+        await asyncio.gather(*(_load_relation(loaders, rows, name, relations[name]) for name in expand))
+    return rows
@@ -0,0 +1,107 @@
+import csv
+import io
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from prisma import Prisma
+
+EXPORT_BATCH_SIZE = 5000
+
+
+def _timestamp_param(value: datetime) -> str:
+    """created_at is a naive UTC timestamp; raw params reach Postgres as text"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+TRANSACTION_EXPORT_COLUMNS = [
+    "id", "user_id", "amount", "type", "status",
+    "description", "reference_id", "created_at", "updated_at",
+]
+
+
+async def _transaction_batches(
+    db: Prisma,
+    after_id: int,
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    status: Optional[str],
+    type: Optional[str],
+) -> AsyncIterator[list[dict]]:
+    """Keyset-paginated raw rows (no model objects, to keep per-row cost low)"""
+    filters = []
+    params: list = []
+    if date_from:
+        params.append(_timestamp_param(date_from))
+        filters.append(f"created_at >= ${len(params) + 1}::timestamp")
+    if date_to:
+        params.append(_timestamp_param(date_to))
+        filters.append(f"created_at < ${len(params) + 1}::timestamp")
+    if status:
+        params.append(status)
+        filters.append(f'status = ${len(params) + 1}::"TransactionStatus"')
+    if type:
+        params.append(type)
+        filters.append(f'type = ${len(params) + 1}::"TransactionType"')
+
+    where = "".join(f" AND {f}" for f in filters)
+    query = f"""
+        SELECT id, user_id, amount::text AS amount, type::text AS type, status::text AS status,
+               description, reference_id, created_at, updated_at
+        FROM transactions
+        WHERE id > $1{where}
+        ORDER BY id
+        LIMIT {EXPORT_BATCH_SIZE}
+    """
+
+    last_id = after_id
+    while True:
+        rows = await db.query_raw(query, last_id, *params)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def stream_transactions_csv(
+    db: Prisma,
+    after_id: int = 0,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Yield transactions as CSV in id order, optionally gzip-compressed on the fly.
+
+    Rows start after `after_id`, so an interrupted download is resumed by
+    passing the last id received.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    # The header is only written on a fresh export, not on resume
+    if after_id == 0:
+        writer.writerow(TRANSACTION_EXPORT_COLUMNS)
+
+    async for rows in _transaction_batches(db, after_id, date_from, date_to, status, type):
+        writer.writerows([row[column] for column in TRANSACTION_EXPORT_COLUMNS] for row in rows)
+        chunk = flush()
+        if chunk:
+            yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,180 @@
+import asyncio
+from collections import defaultdict
+from typing import Literal, Optional
+from prisma import Prisma
+from prisma.models import LawyerProfile
+from app.config import settings
+from app.core.jobs import job_runner
+from app.core.specializations import normalize_specializations, specialization_index
+
+# (label, min years, max years or None)
+EXPERIENCE_BUCKETS: list[tuple[str, int, Optional[int]]] = [
+    ("0-2", 0, 2),
+    ("3-5", 3, 5),
+    ("6-10", 6, 10),
+    ("11-20", 11, 20),
+    ("21+", 21, None),
+]
+ExperienceBucket = Literal["0-2", "3-5", "6-10", "11-20", "21+"]
+
+
+def experience_bucket(years: int) -> str:
+    for label, low, high in EXPERIENCE_BUCKETS:
+        if years >= low and (high is None or years <= high):
+            return label
+    return EXPERIENCE_BUCKETS[0][0]
+
+
+def experience_range(label: str) -> tuple[int, Optional[int]]:
+    for bucket, low, high in EXPERIENCE_BUCKETS:
+        if bucket == label:
+            return low, high
+    raise ValueError(f"Unknown experience bucket: {label}")
+
+
+_Key = tuple[str, bool]  # (experience bucket, verified)
+_TagKey = tuple[str, str, bool]  # (specialization slug, experience bucket, verified)
+
+
+class LawyerFacetCache:
+    """
+    Lawyer profile counts per (experience bucket, verified), and per
+    (specialization tag, experience bucket, verified).
+
+    Specializations are the normalized tags of app.core.specializations, so
+    "Family Law" and "family-law" are one facet value, matching
+    /lawyers/match. A profile counts once under each of its tags.
+
+    The combination tables are small, so facet counts for any filter are
+    summed from them in memory. They are adjusted by this worker's profile
+    write handlers, reloaded in the background after broad writes (bulk
+    updates, purges), and reloaded every FACETS_REFRESH_SECONDS so writes
+    made by other workers are picked up.
+    """
+
+    def __init__(self):
+        self._counts: dict[_Key, int] = defaultdict(int)
+        self._tag_counts: dict[_TagKey, int] = defaultdict(int)
+
+    @staticmethod
+    def _keys(profile: LawyerProfile) -> tuple[_Key, list[_TagKey]]:
+        key = (experience_bucket(profile.experienceYears), profile.isVerified)
+        return key, [(slug, *key) for slug, _ in normalize_specializations(profile.specialization)]
+
+    async def load(self, db: Prisma) -> None:
+        rows = await db.query_raw(
+            """
+            SELECT experience_years, is_verified, COUNT(*)::int AS count
+            FROM lawyer_profiles
+            GROUP BY 1, 2
+            """
+        )
+        counts: dict[_Key, int] = defaultdict(int)
+        for row in rows:
+            counts[(experience_bucket(row["experience_years"]), row["is_verified"])] += row["count"]
+
+        rows = await db.query_raw(
+            """
+            SELECT t.slug, p.experience_years, p.is_verified, COUNT(*)::int AS count
+            FROM lawyer_specializations ls
+            JOIN specialization_tags t ON t.id = ls.tag_id
+            JOIN lawyer_profiles p ON p.id = ls.profile_id
+            GROUP BY 1, 2, 3
+            """
+        )
+        tag_counts: dict[_TagKey, int] = defaultdict(int)
+        for row in rows:
+            tag_counts[(row["slug"], experience_bucket(row["experience_years"]), row["is_verified"])] += row["count"]
+
+        self._counts, self._tag_counts = counts, tag_counts
+
+    def reload(self, db: Prisma) -> None:
+        job_runner.enqueue("default", self.load, db)
+
+    async def run(self, db: Prisma) -> None:
+        """Reload loop, runs for the lifetime of the app"""
+        while True:
+            try:
+                await self.load(db)
+            except Exception as e:
+                print(f"⚠️ Lawyer facets reload failed: {e}")
+            await asyncio.sleep(settings.FACETS_REFRESH_SECONDS)
+
+    def profile_added(self, profile: LawyerProfile) -> None:
+        key, tag_keys = self._keys(profile)
+        self._counts[key] += 1
+        for tag_key in tag_keys:
+            self._tag_counts[tag_key] += 1
+
+    def profile_changed(self, old: LawyerProfile, new: LawyerProfile) -> None:
+        old_key, old_tag_keys = self._keys(old)
+        new_key, new_tag_keys = self._keys(new)
+        if old_key != new_key:
+            self._counts[old_key] = max(0, self._counts[old_key] - 1)
+            self._counts[new_key] += 1
+        if old_tag_keys != new_tag_keys:
+            for tag_key in old_tag_keys:
+                self._tag_counts[tag_key] = max(0, self._tag_counts[tag_key] - 1)
+            for tag_key in new_tag_keys:
+                self._tag_counts[tag_key] += 1
+
+    def facets(
+        self,
+        specialization: Optional[str] = None,
+        experience: Optional[str] = None,
+        verified: Optional[bool] = None,
+    ) -> tuple[int, dict[str, list[dict]]]:
+        """
+        Total matching profiles, and per-facet counts. Each facet's counts
+        apply the other facets' filters, but not its own. `specialization`
+        is a tag slug.
+        """
+        by_specialization: dict[str, int] = defaultdict(int)
+        by_experience: dict[str, int] = defaultdict(int)
+        by_verified: dict[bool, int] = defaultdict(int)
+        total = 0
+
+        for (slug, bucket, is_verified), count in self._tag_counts.items():
+            if count and (experience is None or bucket == experience) and (verified is None or is_verified == verified):
+                by_specialization[slug] += count
+
+        # A profile has each tag at most once, so per-tag counts are exact once filtered to one tag
+        if specialization is None:
+            counts = self._counts.items()
+        else:
+            counts = (
+                ((bucket, is_verified), count)
+                for (slug, bucket, is_verified), count in self._tag_counts.items()
+                if slug == specialization
+            )
+
+        for (bucket, is_verified), count in counts:
+            if not count:
+                continue
+            exp_ok = experience is None or bucket == experience
+            ver_ok = verified is None or is_verified == verified
+
+            if ver_ok:
+                by_experience[bucket] += count
+            if exp_ok:
+                by_verified[is_verified] += count
+            if exp_ok and ver_ok:
+                total += count
+
+        return total, {
+            "specialization": [
+                {"value": slug, "label": specialization_index.name(slug), "count": count}
+                for slug, count in sorted(by_specialization.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            "experience": [
+                {"value": label, "count": by_experience[label]}
+                for label, _, _ in EXPERIENCE_BUCKETS
+            ],
+            "verified": [
+                {"value": value, "count": by_verified[value]}
+                for value in (True, False)
+            ],
+        }
+
+
+lawyer_facets = LawyerFacetCache()
@@ -0,0 +1,227 @@
+"""
+Sitemap and RSS/Atom documents for the public blog.
+
+Documents are built from keyset batches of raw rows, gzip-compressed while
+they stream, and the compressed bytes are kept per worker until a post or
+category changes (or FEED_CACHE_TTL_SECONDS pass, for changes made through
+other workers).
+"""
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from xml.sax.saxutils import escape
+from prisma import Prisma
+from app.config import settings
+
+SITEMAP_MAX_URLS = 50_000
+FEED_BATCH_SIZE = 5000
+
+# Public (frontend) paths
+POST_PATH = "/blog/{slug}"
+CATEGORY_PATH = "/blog/category/{slug}"
+
+
+def _url(path: str, **params) -> str:
+    return escape(settings.SITE_URL.rstrip("/") + path.format(**params))
+
+
+# Documents
+
+async def _published_posts(db: Prisma, start_id: int = 0, end_id: Optional[int] = None) -> AsyncIterator[list[dict]]:
+    """Published posts with start_id <= id < end_id, in id-ordered batches"""
+    bound = "" if end_id is None else " AND id < $3"
+    params = [] if end_id is None else [end_id]
+    last_id = start_id - 1
+    while True:
+        rows = await db.query_raw(
+            f"""
+            SELECT id, slug, to_char(updated_at, 'YYYY-MM-DD"T"HH24:MI:SS"Z"') AS lastmod
+            FROM blog_posts
+            WHERE is_published AND id > $1{bound}
+            ORDER BY id
+            LIMIT $2
+            """,
+            last_id,
+            FEED_BATCH_SIZE,
+            *params,
+        )
+        if not rows:
+            return
+        yield rows
+        if len(rows) < FEED_BATCH_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def sitemap_shards(db: Prisma) -> list[int]:
+    """First post id of each SITEMAP_MAX_URLS-sized shard (one entry when unsharded)"""
+    rows = await db.query_raw(
+        """
+        SELECT id FROM (
+            SELECT id, row_number() OVER (ORDER BY id) AS n
+            FROM blog_posts WHERE is_published
+        ) numbered
+        WHERE n % $1 = 1
+        ORDER BY id
+        """,
+        SITEMAP_MAX_URLS,
+    )
+    return [row["id"] for row in rows] or [0]
+
+
+async def sitemap_index(shards: list[int]) -> AsyncIterator[bytes]:
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield b'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    paths = ["/sitemaps/categories.xml"] + [f"/sitemaps/posts-{n}.xml" for n in range(len(shards))]
+    for path in paths:
+        yield f"<sitemap><loc>{_url(path)}</loc></sitemap>\n".encode()
+    yield b"</sitemapindex>\n"
+
+
+async def sitemap_urlset(
+    db: Prisma,
+    categories: bool = True,
+    start_id: int = 0,
+    end_id: Optional[int] = None,
+    posts: bool = True,
+) -> AsyncIterator[bytes]:
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    if categories:
+        rows = await db.query_raw(
+            """
+            SELECT slug, to_char(updated_at, 'YYYY-MM-DD"T"HH24:MI:SS"Z"') AS lastmod
+            FROM blog_categories ORDER BY id
+            """
+        )
+        yield "".join(
+            f"<url><loc>{_url(CATEGORY_PATH, slug=row['slug'])}</loc><lastmod>{row['lastmod']}</lastmod></url>\n"
+            for row in rows
+        ).encode()
+    if posts:
+        async for rows in _published_posts(db, start_id, end_id):
+            yield "".join(
+                f"<url><loc>{_url(POST_PATH, slug=row['slug'])}</loc><lastmod>{row['lastmod']}</lastmod></url>\n"
+                for row in rows
+            ).encode()
+    yield b"</urlset>\n"
+
+
+async def _latest_posts(db: Prisma) -> list[dict]:
+    return await db.query_raw(
+        """
+        SELECT p.slug, p.title, COALESCE(p.excerpt, p.auto_excerpt, '') AS summary, c.name AS category,
+               to_char(p.published_at, 'Dy, DD Mon YYYY HH24:MI:SS "+0000"') AS pub_date,
+               to_char(p.published_at, 'YYYY-MM-DD"T"HH24:MI:SS"Z"') AS published,
+               to_char(p.updated_at, 'YYYY-MM-DD"T"HH24:MI:SS"Z"') AS updated
+        FROM blog_posts p
+        JOIN blog_categories c ON c.id = p.category_id
+        WHERE p.is_published
+        ORDER BY p.published_at DESC NULLS LAST, p.id DESC
+        LIMIT $1
+        """,
+        settings.FEED_SIZE,
+    )
+
+
+async def rss_feed(db: Prisma) -> AsyncIterator[bytes]:
+    rows = await _latest_posts(db)
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+    yield (
+        f"<title>{escape(settings.APP_NAME)}</title><link>{_url('/blog')}</link>"
+        f"<description>{escape(settings.APP_NAME)}</description>\n"
+    ).encode()
+    for row in rows:
+        link = _url(POST_PATH, slug=row["slug"])
+        yield (
+            f"<item><title>{escape(row['title'])}</title><link>{link}</link><guid>{link}</guid>"
+            f"<category>{escape(row['category'])}</category><pubDate>{row['pub_date'] or ''}</pubDate>"
+            f"<description>{escape(row['summary'])}</description></item>\n"
+        ).encode()
+    yield b"</channel></rss>\n"
+
+
+async def atom_feed(db: Prisma) -> AsyncIterator[bytes]:
+    rows = await _latest_posts(db)
+    updated = max((row["updated"] for row in rows), default="1970-01-01T00:00:00Z")
+    yield b'<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield (
+        f"<title>{escape(settings.APP_NAME)}</title><id>{_url('/blog')}</id>"
+        f'<link href="{_url("/blog")}"/><link rel="self" href="{_url("/atom.xml")}"/>'
+        f"<updated>{updated}</updated><author><name>{escape(settings.APP_NAME)}</name></author>\n"
+    ).encode()
+    for row in rows:
+        link = _url(POST_PATH, slug=row["slug"])
+        yield (
+            f'<entry><title>{escape(row["title"])}</title><link href="{link}"/><id>{link}</id>'
+            f"<published>{row['published'] or row['updated']}</published><updated>{row['updated']}</updated>"
+            f"<summary>{escape(row['summary'])}</summary></entry>\n"
+        ).encode()
+    yield b"</feed>\n"
+
+
+# Cache
+
+@dataclass
+class CachedDocument:
+    body: bytes  # gzip
+    last_modified: datetime
+    expires: float
+
+
+class FeedCache:
+    """Gzip-compressed documents, dropped whenever published content changes"""
+
+    def __init__(self):
+        self._documents: dict[str, CachedDocument] = {}
+        self._generation = 0
+        self._changed_at: Optional[datetime] = None
+
+    def get(self, key: str) -> Optional[CachedDocument]:
+        document = self._documents.get(key)
+        if document is None or document.expires <= time.monotonic():
+            return None
+        return document
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._documents.clear()
+        self._changed_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+    async def last_modified(self, db: Prisma) -> datetime:
+        """Latest change to posts or categories (deletions are tracked in-process)"""
+        rows = await db.query_raw(
+            """
+            SELECT EXTRACT(EPOCH FROM GREATEST(
+                (SELECT max(updated_at) FROM blog_posts WHERE is_published),
+                (SELECT max(updated_at) FROM blog_categories)
+            ))::float8 AS ts
+            """
+        )
+        ts = rows[0]["ts"] if rows and rows[0]["ts"] is not None else 0
+        modified = datetime.fromtimestamp(int(ts), timezone.utc)
+        return max(modified, self._changed_at) if self._changed_at else modified
+
+    async def compress(self, key: str, chunks: AsyncIterator[bytes], last_modified: datetime) -> AsyncIterator[bytes]:
+        """Gzip chunks as they are produced; the full result is cached unless invalidated meanwhile"""
+        generation = self._generation
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        parts: list[bytes] = []
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                parts.append(compressed)
+                yield compressed
+        compressed = compressor.flush()
+        parts.append(compressed)
+        yield compressed
+
+        if generation == self._generation:
+            self._documents[key] = CachedDocument(
+                b"".join(parts), last_modified, time.monotonic() + settings.FEED_CACHE_TTL_SECONDS
+            )
+
+
+feed_cache = FeedCache()
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import HTTPException, Response, status
+from prisma import Prisma
+from prisma.errors import UniqueViolationError
+from pydantic import BaseModel
+from app.config import settings
+
+# Delete expired records every this many claims
+CLEANUP_EVERY = 500
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash of the request payload, to detect a key reused for a different request"""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _key_reused() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key was already used for a different request"
+    )
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key handling: an in-process LRU of completed responses in
+    front of the idempotency_records table.
+
+    Duplicates of a completed request get the stored response replayed.
+    Duplicates of an in-flight request wait for it: on the same worker via a
+    shared future, on other workers by polling the database row. An in-flight
+    claim is leased for IDEMPOTENCY_LOCK_SECONDS; if its worker dies, a retry
+    takes the key over once the lease lapses.
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: OrderedDict[str, tuple[float, str, int, str]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._claims = 0
+
+    def _cache_get(self, key: str) -> Optional[tuple[str, int, str]]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry[1:]
+
+    def _cache_set(self, key: str, expires_at: datetime, fingerprint: str, status_code: int, body: str) -> None:
+        self._cache[key] = (expires_at.timestamp(), fingerprint, status_code, body)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _replay(fingerprint: str, stored: tuple[str, int, str]) -> Response:
+        stored_fingerprint, status_code, body = stored
+        if stored_fingerprint != fingerprint:
+            raise _key_reused()
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    async def run(
+        self,
+        db: Prisma,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+        schema: type[BaseModel],
+        status_code: int = status.HTTP_200_OK,
+    ) -> Response:
+        """Run `handler` once per key, replaying its response for duplicates"""
+        while True:
+            stored = self._cache_get(key)
+            if stored is not None:
+                return self._replay(fingerprint, stored)
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            return await self._run_claimed(db, key, fingerprint, handler, schema, status_code)
+        finally:
+            del self._inflight[key]
+            future.set_result(None)
+
+    @staticmethod
+    def _lease(now: datetime) -> datetime:
+        return now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+
+    async def _run_claimed(self, db, key, fingerprint, handler, schema, status_code) -> Response:
+        now = datetime.now(timezone.utc)
+
+        self._claims += 1
+        if self._claims % CLEANUP_EVERY == 0:
+            await db.idempotencyrecord.delete_many(where={"expiresAt": {"lt": now}})
+
+        try:
+            await db.idempotencyrecord.create(
+                data={
+                    "key": key,
+                    "requestHash": fingerprint,
+                    "lockedUntil": self._lease(now),
+                    "expiresAt": now + self.ttl,
+                }
+            )
+        except UniqueViolationError:
+            return await self._wait_for_record(db, key, fingerprint, handler, schema, status_code)
+
+        return await self._run_handler(db, key, fingerprint, handler, schema, status_code)
+
+    async def _run_handler(self, db, key, fingerprint, handler, schema, status_code) -> Response:
+        """Run the handler for a key this worker has claimed, and store its response"""
+        try:
+            result = await handler()
+        except BaseException:
+            # Let a retry run the handler again
+            await db.idempotencyrecord.delete_many(where={"key": key, "completedAt": None})
+            raise
+
+        body = schema.model_validate(result).model_dump_json()
+        completed_at = datetime.now(timezone.utc)
+        expires_at = completed_at + self.ttl
+        try:
+            await db.idempotencyrecord.update(
+                where={"key": key},
+                data={
+                    "statusCode": status_code,
+                    "responseBody": body,
+                    "completedAt": completed_at,
+                    "lockedUntil": None,
+                    "expiresAt": expires_at,
+                }
+            )
+        except Exception as e:
+            # The handler's work is done: still answer, and replay from this worker's cache
+            print(f"⚠️ Idempotency record {key} could not be completed: {e}")
+        self._cache_set(key, expires_at, fingerprint, status_code, body)
+
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+    async def _wait_for_record(self, db, key, fingerprint, handler, schema, status_code) -> Response:
+        """Another worker holds the key: wait for its response, or take over a lapsed lease"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            record = await db.idempotencyrecord.find_unique(where={"key": key})
+            now = datetime.now(timezone.utc)
+
+            if record is None or record.expiresAt <= now:
+                # Holder failed or the record expired, claim it ourselves
+                await db.idempotencyrecord.delete_many(where={"key": key, "expiresAt": {"lte": now}})
+                return await self._run_claimed(db, key, fingerprint, handler, schema, status_code)
+
+            if record.requestHash != fingerprint:
+                raise _key_reused()
+
+            if record.completedAt is not None:
+                stored = (record.requestHash, record.statusCode, record.responseBody)
+                self._cache_set(key, record.expiresAt, *stored)
+                return self._replay(fingerprint, stored)
+
+            if record.lockedUntil is None or record.lockedUntil <= now:
+                # The holder died mid-request; only one waiter wins the takeover
+                taken = await db.idempotencyrecord.update_many(
+                    where={
+                        "key": key,
+                        "completedAt": None,
+                        "OR": [{"lockedUntil": None}, {"lockedUntil": {"lte": now}}],
+                    },
+                    data={"lockedUntil": self._lease(now)}
+                )
+                if taken:
+                    return await self._run_handler(db, key, fingerprint, handler, schema, status_code)
+                continue
+
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+
+idempotency_store = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+)
@@ -0,0 +1,287 @@
+"""
+In-process background jobs.
+
+In-memory queues run coroutine functions with bounded concurrency and
+retries. Durable jobs go through the background_jobs table (claimed with
+SKIP LOCKED, so several workers can share it) and refer to handlers
+registered by name, because they may run in another process.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from prisma import Json, Prisma
+from app.config import settings
+
+JobFunc = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class QueueConfig:
+    concurrency: int = 4
+    max_retries: int = 3
+    backoff_seconds: float = 0.5
+    max_size: int = 10_000
+
+
+@dataclass
+class _Job:
+    func: JobFunc
+    args: tuple
+    kwargs: dict
+    attempt: int = 0
+
+
+@dataclass
+class _Queue:
+    config: QueueConfig
+    queue: asyncio.Queue
+    workers: list[asyncio.Task] = field(default_factory=list)
+    running: int = 0
+
+
+class JobRunner:
+    def __init__(self):
+        self._queue_configs: dict[str, QueueConfig] = {}
+        self._queues: dict[str, _Queue] = {}
+        self._handlers: dict[str, JobFunc] = {}
+        self._durable_tasks: list[asyncio.Task] = []
+        self._retry_tasks: set[asyncio.Task] = set()
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._db: Optional[Prisma] = None
+        self._accepting = False
+
+    def add_queue(self, name: str, config: QueueConfig) -> None:
+        """Declare a queue (before start)"""
+        self._queue_configs[name] = config
+
+    def handler(self, name: str):
+        """Register a coroutine function as a durable job handler"""
+        def decorator(func: JobFunc) -> JobFunc:
+            self._handlers[name] = func
+            return func
+        return decorator
+
+    # Lifecycle
+
+    async def start(self, db: Prisma) -> None:
+        self._db = db
+        for name, config in self._queue_configs.items():
+            q = _Queue(config=config, queue=asyncio.Queue(maxsize=config.max_size))
+            q.workers = [asyncio.create_task(self._worker(name, q)) for _ in range(config.concurrency)]
+            self._queues[name] = q
+            if settings.DURABLE_JOBS_ENABLED:
+                self._durable_tasks.append(asyncio.create_task(self._poll_durable(name, config)))
+        self._accepting = True
+
+    async def drain(self, timeout: float) -> None:
+        """Stop accepting jobs, let queued ones finish within `timeout`, then cancel workers"""
+        self._accepting = False
+        for task in self._durable_tasks:
+            task.cancel()
+
+        try:
+            await asyncio.wait_for(self._wait_idle(), timeout)
+        except asyncio.TimeoutError:
+            print("⚠️ Background jobs did not finish before shutdown")
+
+        for task in self._retry_tasks:
+            task.cancel()
+        for q in self._queues.values():
+            for worker in q.workers:
+                worker.cancel()
+        self._queues.clear()
+        self._durable_tasks.clear()
+
+    async def _wait_idle(self) -> None:
+        while True:
+            await asyncio.gather(*(q.queue.join() for q in self._queues.values()))
+            if not self._retry_tasks:
+                return
+            await asyncio.gather(*list(self._retry_tasks), return_exceptions=True)
+
+    # In-memory jobs
+
+    def enqueue(self, queue: str, func: JobFunc, *args, **kwargs) -> bool:
+        """Schedule func(*args, **kwargs); returns False if the job was dropped"""
+        q = self._queues.get(queue)
+        if q is None or not self._accepting:
+            self._counters[queue]["dropped"] += 1
+            return False
+        try:
+            q.queue.put_nowait(_Job(func, args, kwargs))
+        except asyncio.QueueFull:
+            self._counters[queue]["dropped"] += 1
+            return False
+        self._counters[queue]["enqueued"] += 1
+        return True
+
+    async def _worker(self, name: str, q: _Queue) -> None:
+        while True:
+            job = await q.queue.get()
+            q.running += 1
+            try:
+                await job.func(*job.args, **job.kwargs)
+                self._counters[name]["succeeded"] += 1
+            except Exception as e:
+                if job.attempt < q.config.max_retries:
+                    job.attempt += 1
+                    self._counters[name]["retried"] += 1
+                    self._schedule_retry(name, q, job, self._backoff(q.config, job.attempt))
+                else:
+                    self._counters[name]["failed"] += 1
+                    print(f"❌ Job {getattr(job.func, '__name__', job.func)} on '{name}' failed: {e}")
+            finally:
+                q.running -= 1
+                q.queue.task_done()
+
+    @staticmethod
+    def _backoff(config: QueueConfig, attempt: int) -> float:
+        delay = config.backoff_seconds * 2 ** (attempt - 1)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _schedule_retry(self, name: str, q: _Queue, job: _Job, delay: float) -> None:
+        async def requeue():
+            await asyncio.sleep(delay)
+            try:
+                q.queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self._counters[name]["dropped"] += 1
+                print(f"❌ Retry of {getattr(job.func, '__name__', job.func)} on '{name}' dropped: queue full")
+
+        task = asyncio.create_task(requeue())
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    # Durable jobs
+
+    async def enqueue_durable(self, queue: str, name: str, payload: dict, max_attempts: Optional[int] = None) -> None:
+        """Persist a job for the handler registered as `name`"""
+        config = self._queue_configs.get(queue, QueueConfig())
+        await self._db.backgroundjob.create(
+            data={
+                "queue": queue,
+                "name": name,
+                "payload": Json(payload),
+                "maxAttempts": max_attempts or config.max_retries + 1,
+            }
+        )
+        self._counters[queue]["durable_enqueued"] += 1
+
+    async def _reclaim_stale(self, queue: str) -> None:
+        # Jobs left RUNNING by a crashed worker go back to the queue
+        await self._db.execute_raw(
+            """
+            UPDATE background_jobs SET status = 'PENDING', locked_at = NULL, updated_at = now()
+            WHERE queue = $1 AND status = 'RUNNING'
+              AND locked_at < now() - make_interval(secs => $2)
+            """,
+            queue,
+            settings.DURABLE_JOB_LOCK_TIMEOUT_SECONDS,
+        )
+
+    async def _poll_durable(self, queue: str, config: QueueConfig) -> None:
+        reclaimed_at = float("-inf")
+        while True:
+            if time.monotonic() - reclaimed_at >= settings.DURABLE_JOB_LOCK_TIMEOUT_SECONDS:
+                try:
+                    await self._reclaim_stale(queue)
+                    reclaimed_at = time.monotonic()
+                except Exception as e:
+                    print(f"⚠️ Durable job reclaim on '{queue}' failed: {e}")
+
+            try:
+                jobs = await self._db.query_raw(
+                    """
+                    UPDATE background_jobs
+                    SET status = 'RUNNING', locked_at = now(), attempts = attempts + 1, updated_at = now()
+                    WHERE id IN (
+                        SELECT id FROM background_jobs
+                        WHERE queue = $1 AND status = 'PENDING' AND run_at <= now()
+                        ORDER BY run_at
+                        LIMIT $2
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, name, payload, attempts, max_attempts
+                    """,
+                    queue,
+                    config.concurrency,
+                )
+            except Exception as e:
+                print(f"⚠️ Durable job poll on '{queue}' failed: {e}")
+                jobs = []
+
+            if not jobs:
+                await asyncio.sleep(settings.DURABLE_JOB_POLL_SECONDS)
+                continue
+
+            await asyncio.gather(*(self._run_durable(queue, config, job) for job in jobs))
+
+    async def _set_status(self, queue: str, job_id: int, query: str, *args) -> None:
+        """Job bookkeeping; a failure is logged, and the row is reclaimed once its lock times out"""
+        try:
+            await self._db.execute_raw(query, job_id, *args)
+        except Exception as e:
+            self._counters[queue]["durable_bookkeeping_failed"] += 1
+            print(f"⚠️ Durable job {job_id} on '{queue}' status update failed: {e}")
+
+    async def _run_durable(self, queue: str, config: QueueConfig, job: dict) -> None:
+        started = time.monotonic()
+        try:
+            handler = self._handlers[job["name"]]
+            payload = job["payload"]
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            await handler(**payload)
+        except Exception as e:
+            if job["attempts"] < job["max_attempts"]:
+                self._counters[queue]["durable_retried"] += 1
+                await self._set_status(
+                    queue,
+                    job["id"],
+                    """
+                    UPDATE background_jobs
+                    SET status = 'PENDING', locked_at = NULL, last_error = $2,
+                        run_at = now() + make_interval(secs => $3), updated_at = now()
+                    WHERE id = $1
+                    """,
+                    str(e),
+                    self._backoff(config, job["attempts"]),
+                )
+            else:
+                self._counters[queue]["durable_failed"] += 1
+                await self._set_status(
+                    queue,
+                    job["id"],
+                    "UPDATE background_jobs SET status = 'FAILED', last_error = $2, updated_at = now() WHERE id = $1",
+                    str(e),
+                )
+            return
+
+        self._counters[queue]["durable_succeeded"] += 1
+        self._counters[queue]["durable_runtime_ms"] += int((time.monotonic() - started) * 1000)
+        await self._set_status(
+            queue,
+            job["id"],
+            "UPDATE background_jobs SET status = 'DONE', locked_at = NULL, updated_at = now() WHERE id = $1",
+        )
+
+    def metrics(self) -> dict:
+        return {
+            name: {
+                "pending": q.queue.qsize(),
+                "running": q.running,
+                "concurrency": q.config.concurrency,
+                **self._counters[name],
+            }
+            for name, q in self._queues.items()
+        }
+
+
+job_runner = JobRunner()
+job_runner.add_queue("default", QueueConfig(concurrency=4))
+# Cheap fire-and-forget writes (view counts, timestamps)
+job_runner.add_queue("writes", QueueConfig(concurrency=8, max_retries=2, backoff_seconds=0.2))
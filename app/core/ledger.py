@@ -0,0 +1,180 @@
+"""
+Per-user credit ledger.
+
+Reconcile User.credit against the ledger with:
+python -m app.core.ledger [--batch-size 1000]
+
+Credit that predates the ledger is recorded as one opening entry per user
+(no transaction) by the deploy step:
+python -m app.core.ledger --seed-opening
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+from decimal import Decimal
+from fastapi import HTTPException, status
+from prisma import Prisma
+from prisma.models import Transaction, User
+from app.core.analytics import record_transaction_change
+
+CREDIT_TYPES = {"DEPOSIT", "REFUND"}
+DEBIT_TYPES = {"WITHDRAW", "PAYMENT"}
+
+
+def credit_delta(transaction: Transaction) -> Decimal:
+    """Signed change to the user's credit when the transaction settles"""
+    if transaction.type in CREDIT_TYPES:
+        return transaction.amount
+    if transaction.type in DEBIT_TYPES:
+        return -transaction.amount
+    return Decimal(0)
+
+
+async def settle_transaction(db: Prisma, transaction: Transaction, new_status: str) -> None:
+    """
+    Apply a pending transaction to the user's credit and append the ledger
+    entry, all in one database transaction.
+    """
+    delta = credit_delta(transaction)
+
+    async with db.tx() as tx:
+        # Claiming the row guards against settling the same transaction twice
+        claimed = await tx.transaction.update_many(
+            where={"id": transaction.id, "status": "PENDING"},
+            data={"status": new_status}
+        )
+        if claimed == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Transaction is no longer pending"
+            )
+
+        user = await tx.user.update(
+            where={"id": transaction.userId},
+            data={"credit": {"increment": delta}}
+        )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        if user.credit < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Insufficient credit"
+            )
+
+        await tx.creditledgerentry.create(
+            data={
+                "userId": transaction.userId,
+                "transactionId": transaction.id,
+                "amount": delta,
+                "balance": user.credit,
+            }
+        )
+
+        await record_transaction_change(tx, transaction, transaction.status, new_status)
+
+
+async def seed_opening_balances(db: Prisma, batch_size: int = 1000) -> int:
+    """
+    Insert an opening entry (transactionId None) for every user with
+    non-zero credit and no ledger rows yet; returns entries written.
+    Idempotent, so it can run on every deploy.
+    """
+    seeded = 0
+    last_id = 0
+    while True:
+        rows = await db.query_raw(
+            "SELECT id FROM users WHERE id > $1 ORDER BY id LIMIT $2",
+            last_id,
+            batch_size,
+        )
+        if not rows:
+            break
+        ids = [row["id"] for row in rows]
+        seeded += await db.execute_raw(
+            """
+            INSERT INTO credit_ledger (user_id, transaction_id, amount, balance)
+            SELECT u.id, NULL, u.credit, u.credit
+            FROM users u
+            WHERE u.id = ANY($1::int[]) AND u.credit <> 0
+              AND NOT EXISTS (SELECT 1 FROM credit_ledger l WHERE l.user_id = u.id)
+            """,
+            ids,
+        )
+        last_id = ids[-1]
+    return seeded
+
+
+@dataclass
+class BalanceMismatch:
+    user_id: int
+    credit: Decimal
+    ledger_balance: Decimal
+
+
+async def reconcile_credit_ledger(db: Prisma, batch_size: int = 1000) -> tuple[int, list[BalanceMismatch]]:
+    """Compare User.credit with each user's latest ledger balance, in id-ordered batches"""
+    checked = 0
+    mismatches: list[BalanceMismatch] = []
+    last_id = 0
+
+    while True:
+        users: list[User] = await db.user.find_many(
+            where={"id": {"gt": last_id}},
+            take=batch_size,
+            order={"id": "asc"}
+        )
+        if not users:
+            break
+
+        rows = await db.query_raw(
+            """
+            SELECT DISTINCT ON (user_id) user_id, balance
+            FROM credit_ledger
+            WHERE user_id = ANY($1::int[])
+            ORDER BY user_id, id DESC
+            """,
+            [user.id for user in users],
+        )
+        balances = {row["user_id"]: Decimal(str(row["balance"])) for row in rows}
+
+        for user in users:
+            ledger_balance = balances.get(user.id, Decimal(0))
+            if user.credit != ledger_balance:
+                mismatches.append(BalanceMismatch(user.id, user.credit, ledger_balance))
+
+        checked += len(users)
+        last_id = users[-1].id
+
+    return checked, mismatches
+
+
+async def _main(batch_size: int, seed_opening: bool) -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    await connect_db()
+    try:
+        if seed_opening:
+            seeded = await seed_opening_balances(db, batch_size)
+            print(f"✅ Seeded {seeded} opening balances")
+            return
+        checked, mismatches = await reconcile_credit_ledger(db, batch_size)
+    finally:
+        await disconnect_db()
+
+    for mismatch in mismatches:
+        print(f"❌ user {mismatch.user_id}: credit={mismatch.credit} ledger={mismatch.ledger_balance}")
+    print(f"\nChecked {checked} users, {len(mismatches)} mismatches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile User.credit against the credit ledger")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--seed-opening", action="store_true",
+        help="record existing credit as opening entries for users without ledger rows"
+    )
+    args = parser.parse_args()
+    asyncio.run(_main(args.batch_size, args.seed_opening))
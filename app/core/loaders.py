@@ -0,0 +1,113 @@
+"""
+Request-scoped batched loaders (DataLoader pattern) for the Prisma client.
+
+Loads issued in the same event-loop tick are collapsed into one
+find_many(where={key: {"in": [...]}}), and every result is memoized for the
+rest of the request.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Any, Hashable, Iterable, Optional
+from prisma import Prisma
+
+
+class Loader:
+    """Batches and memoizes lookups of one model by a unique column"""
+
+    def __init__(self, delegate, key: str, counters: dict[str, int]):
+        self._delegate = delegate
+        self._key = key
+        self._counters = counters
+        self._memo: dict[Hashable, asyncio.Future] = {}
+        self._pending: list[Hashable] = []
+        # The loop only keeps weak references to tasks
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, value: Hashable) -> "asyncio.Future[Optional[Any]]":
+        """Awaitable row for `value` (None if it does not exist)"""
+        self._counters["loads"] += 1
+        future = self._memo.get(value)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._memo[value] = future
+        self._pending.append(value)
+        if len(self._pending) == 1:
+            # Dispatch once the tasks already scheduled this tick have queued their keys
+            loop.call_soon(self._start_dispatch)
+        return future
+
+    def _start_dispatch(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def load_many(self, values: Iterable[Hashable]) -> list[Optional[Any]]:
+        return list(await asyncio.gather(*(self.load(value) for value in values)))
+
+    def prime(self, value: Hashable, row: Any) -> None:
+        """Memoize a row loaded some other way"""
+        if value not in self._memo:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(row)
+            self._memo[value] = future
+
+    async def _dispatch(self) -> None:
+        values, self._pending = self._pending, []
+        self._counters["queries"] += 1
+        try:
+            rows = await self._delegate.find_many(where={self._key: {"in": values}})
+        except Exception as e:
+            for value in values:
+                future = self._memo.pop(value)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {getattr(row, self._key): row for row in rows}
+        for value in values:
+            future = self._memo[value]
+            if not future.done():
+                future.set_result(found.get(value))
+
+
+class LoaderRegistry:
+    """One Loader per (model, key) for the lifetime of a request"""
+
+    def __init__(self, db: Prisma):
+        self._db = db
+        self._loaders: dict[tuple[str, str], Loader] = {}
+        self.counters: dict[str, int] = defaultdict(int)
+
+    def loader(self, model: str, key: str = "id") -> Loader:
+        """Loader for a Prisma client model attribute, e.g. loader("user") or loader("blogpost", "slug")"""
+        loader = self._loaders.get((model, key))
+        if loader is None:
+            loader = Loader(getattr(self._db, model), key, self.counters)
+            self._loaders[(model, key)] = loader
+        return loader
+
+
+class LoaderMetrics:
+    """Process-wide totals of loads vs. queries actually issued"""
+
+    def __init__(self):
+        self._counters: dict[str, int] = defaultdict(int)
+
+    def record(self, registry: LoaderRegistry) -> None:
+        if not registry.counters["loads"]:
+            return
+        self._counters["requests"] += 1
+        self._counters["loads"] += registry.counters["loads"]
+        self._counters["queries"] += registry.counters["queries"]
+
+    def metrics(self) -> dict:
+        return {
+            **self._counters,
+            "queries_saved": self._counters["loads"] - self._counters["queries"],
+        }
+
+
+loader_metrics = LoaderMetrics()
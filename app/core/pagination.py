@@ -0,0 +1,157 @@
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Optional
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from prisma import Prisma
+from app.config import settings
+
+# Tables smaller than this are counted exactly, pg_class estimates are too coarse there
+EXACT_COUNT_THRESHOLD = 10_000
+# Filtered counts are cached per filter (e.g. per user), so bound the cache
+MAX_COUNT_CACHE_ENTRIES = 10_000
+
+
+@dataclass(frozen=True)
+class Page:
+    """Validated pagination parameters"""
+    skip: int
+    limit: int
+    max_limit: int
+
+    @property
+    def streamed(self) -> bool:
+        """Requests above the cap are served as a streamed response"""
+        return self.limit > self.max_limit
+
+
+@lru_cache(maxsize=None)
+def paginate(default_limit: int = 50, max_limit: Optional[int] = None, streamable: bool = True):
+    """
+    Dependency for skip/limit query params with a per-route maximum.
+
+    Routes that cannot stream (streamable=False) reject limits above the
+    maximum with a 422 instead of serving them as a streamed response.
+    """
+    cap = max_limit or settings.MAX_PAGE_SIZE
+
+    async def pagination(
+        skip: Annotated[int, Query(ge=0)] = 0,
+        limit: Annotated[int, Query(ge=1, le=None if streamable else cap)] = default_limit,
+    ) -> Page:
+        return Page(skip=skip, limit=limit, max_limit=cap)
+
+    return pagination
+
+
+async def table_estimate(db: Prisma, table: str) -> int:
+    """Planner row estimate from pg_class (-1 if the table was never analyzed)"""
+    rows = await db.query_raw(
+        "SELECT reltuples::bigint AS estimate FROM pg_class WHERE oid = $1::regclass",
+        table,
+    )
+    return int(rows[0]["estimate"]) if rows else -1
+
+
+_count_cache: dict[tuple[str, str], tuple[float, int]] = {}
+
+
+async def approximate_count(db: Prisma, table: str, model, where: Optional[dict] = None) -> int:
+    """Row count cached for COUNT_CACHE_TTL_SECONDS; large unfiltered tables use pg_class estimates"""
+    key = (table, json.dumps(where or {}, sort_keys=True, default=str))
+    cached = _count_cache.get(key)
+    now = time.monotonic()
+    if cached and cached[0] > now:
+        return cached[1]
+
+    count = None
+    if not where:
+        estimate = await table_estimate(db, table)
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            count = estimate
+    if count is None:
+        count = await model.count(where=where or None)
+
+    if len(_count_cache) >= MAX_COUNT_CACHE_ENTRIES:
+        for stale in [k for k, (expires, _) in _count_cache.items() if expires <= now]:
+            del _count_cache[stale]
+        if len(_count_cache) >= MAX_COUNT_CACHE_ENTRIES:
+            _count_cache.clear()
+    _count_cache[key] = (now + settings.COUNT_CACHE_TTL_SECONDS, count)
+    return count
+
+
+# Applied to each fetched batch, e.g. to attach expanded relations
+RowsTransform = Callable[[list], Awaitable[list]]
+
+
+async def _stream_rows(
+    model,
+    page: Page,
+    where: Optional[dict],
+    order: list[dict],
+    schema: type[BaseModel],
+    transform: Optional[RowsTransform] = None,
+) -> AsyncIterator[bytes]:
+    """Yield a JSON array of rows fetched in cursor batches of page.max_limit"""
+    yield b"["
+    remaining = page.limit
+    cursor = None
+    first = True
+    while remaining > 0:
+        batch_size = min(page.max_limit, remaining)
+        if cursor is None:
+            rows = await model.find_many(where=where, skip=page.skip, take=batch_size, order=order)
+        else:
+            rows = await model.find_many(where=where, cursor={"id": cursor}, skip=1, take=batch_size, order=order)
+        if not rows:
+            break
+        if transform is not None:
+            await transform(rows)
+
+        chunk = b",".join(schema.model_validate(row).model_dump_json().encode() for row in rows)
+        yield chunk if first else b"," + chunk
+        first = False
+
+        remaining -= len(rows)
+        cursor = rows[-1].id
+        if len(rows) < batch_size:
+            break
+    yield b"]"
+
+
+async def paginated(
+    db: Prisma,
+    model,
+    table: str,
+    page: Page,
+    response: Response,
+    schema: type[BaseModel],
+    order: list[dict],
+    where: Optional[dict] = None,
+    transform: Optional[RowsTransform] = None,
+) -> Any:
+    """
+    Run a paginated find_many with an X-Total-Count header.
+
+    `order` must end with a unique column (id) so cursor batches are stable.
+    `transform` is awaited with each batch of rows before it is returned.
+    Returns the rows, or a StreamingResponse when the limit is above the cap.
+    """
+    total = await approximate_count(db, table, model, where)
+
+    if page.streamed:
+        return StreamingResponse(
+            _stream_rows(model, page, where, order, schema, transform),
+            media_type="application/json",
+            headers={"X-Total-Count": str(total)},
+        )
+
+    response.headers["X-Total-Count"] = str(total)
+    rows = await model.find_many(where=where, skip=page.skip, take=page.limit, order=order)
+    if transform is not None:
+        await transform(rows)
+    return rows
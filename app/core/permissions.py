@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Iterable
 
 
 class UserRole(str, Enum):
@@ -75,6 +76,37 @@ ROLE_PERMISSIONS: dict[UserRole, list[Permission]] = {
 }
 
 
+# One bit per permission, compiled once at import
+PERMISSION_BITS: dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+
+
+def permissions_mask(permissions: Iterable[Permission]) -> int:
+    """Combine permissions into a single bitmask"""
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS[permission]
+    return mask
+
+
+# Role -> bitmask of granted permissions. Keys are str enums, so plain role
+# strings (e.g. the role on a Prisma User) look up the same entries.
+ROLE_MASKS: dict[UserRole, int] = {
+    role: permissions_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
 def has_permission(user_role: UserRole, permission: Permission) -> bool:
     """Check if a role has a specific permission"""
-    return permission in ROLE_PERMISSIONS.get(user_role, [])
+    return bool(ROLE_MASKS.get(user_role, 0) & PERMISSION_BITS[permission])
+
+
+def has_all_permissions(user_role: UserRole, mask: int) -> bool:
+    """Check if a role has every permission in the mask"""
+    return ROLE_MASKS.get(user_role, 0) & mask == mask
+
+
+def has_any_permission(user_role: UserRole, mask: int) -> bool:
+    """Check if a role has at least one permission in the mask"""
+    return bool(ROLE_MASKS.get(user_role, 0) & mask)
@@ -0,0 +1,144 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+from prisma import Prisma
+from app.config import settings
+from app.core.jobs import job_runner
+from app.core.stats import stats_cache
+from app.core.facets import lawyer_facets
+from app.core.feeds import feed_cache
+from app.core.specializations import specialization_index
+from app.core.trending import trending_posts
+
+# Rows owned by a user, children before parents. Each entry is a table and
+# the condition selecting the user's rows ($1 = user id).
+_USER_ROWS = [
+    ("ai_chat_messages", "chat_id IN (SELECT id FROM ai_chats WHERE user_id = $1)"),
+    ("ai_chats", "user_id = $1"),
+    ("credit_ledger", "user_id = $1"),
+    ("transactions", "user_id = $1"),
+    ("user_transaction_rollups", "user_id = $1"),
+    ("blog_posts", "author_id = $1"),
+    ("lawyer_specializations", "profile_id IN (SELECT id FROM lawyer_profiles WHERE user_id = $1)"),
+    ("lawyer_profiles", "user_id = $1"),
+    ("refresh_tokens", "user_id = $1"),
+]
+
+
+# Deleted transactions also leave the daily rollups, so the totals match what
+# rebuild_rollups computes from the remaining transactions
+_DELETE_TRANSACTIONS = """
+    WITH deleted AS (
+        DELETE FROM transactions
+        WHERE ctid IN (SELECT ctid FROM transactions WHERE user_id = $1 LIMIT $2)
+        RETURNING created_at, type, status, amount
+    ), removed AS (
+        SELECT created_at::date AS day, type, status, COUNT(*) AS count, SUM(amount) AS amount
+        FROM deleted
+        GROUP BY 1, 2, 3
+    ), adjusted AS (
+        UPDATE transaction_daily_rollups r
+        SET count = r.count - removed.count, amount = r.amount - removed.amount
+        FROM removed
+        WHERE r.day = removed.day AND r.type = removed.type AND r.status = removed.status
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM deleted)::int AS deleted
+"""
+
+# Purges that may be (re)started: not running, or running with a stale heartbeat
+_CLAIM = """
+    UPDATE user_purges
+    SET status = 'RUNNING', attempts = attempts + 1, heartbeat_at = now()
+    WHERE id IN (
+        SELECT id FROM user_purges
+        WHERE ($1::int IS NULL OR id = $1)
+          AND attempts < $2
+          AND (status IN ('PENDING', 'FAILED')
+               OR (status = 'RUNNING' AND COALESCE(heartbeat_at, created_at) < now() - make_interval(secs => $3)))
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, user_id
+"""
+
+
+async def _delete_chunk(db: Prisma, table: str, condition: str, user_id: int) -> int:
+    if table == "transactions":
+        rows = await db.query_raw(_DELETE_TRANSACTIONS, user_id, settings.PURGE_BATCH_SIZE)
+        return rows[0]["deleted"]
+    return await db.execute_raw(
+        f"DELETE FROM {table} WHERE ctid IN (SELECT ctid FROM {table} WHERE {condition} LIMIT $2)",
+        user_id,
+        settings.PURGE_BATCH_SIZE,
+    )
+
+
+async def _claim(db: Prisma, purge_id: Optional[int] = None) -> list[dict]:
+    """Atomically mark claimable purges RUNNING (one, or all), so only one worker runs each"""
+    return await db.query_raw(_CLAIM, purge_id, settings.PURGE_MAX_ATTEMPTS, settings.PURGE_LOCK_TIMEOUT_SECONDS)
+
+
+async def purge_user(db: Prisma, purge_id: int, user_id: int) -> None:
+    """Claim a purge, then run it (a no-op if another worker holds it or it is out of attempts)"""
+    if await _claim(db, purge_id):
+        await _run_purge(db, purge_id, user_id)
+
+
+async def _run_purge(db: Prisma, purge_id: int, user_id: int) -> None:
+    """
+    Delete a soft-deleted user's rows in small batches, then the user itself.
+
+    Failures are recorded on the purge rather than raised: the resumer retries
+    FAILED purges until PURGE_MAX_ATTEMPTS.
+    """
+    posts = await db.query_raw("SELECT id FROM blog_posts WHERE author_id = $1", user_id)
+    try:
+        for table, condition in _USER_ROWS:
+            while True:
+                deleted = await _delete_chunk(db, table, condition, user_id)
+                if deleted == 0:
+                    break
+                await db.userpurge.update(
+                    where={"id": purge_id},
+                    data={"deletedRows": {"increment": deleted}, "heartbeatAt": datetime.now(timezone.utc)}
+                )
+                # Give other transactions a chance at the locks
+                await asyncio.sleep(settings.PURGE_PAUSE_SECONDS)
+
+        await db.user.delete_many(where={"id": user_id})
+    except Exception as e:
+        print(f"❌ User purge {purge_id} failed: {e}")
+        await db.userpurge.update(
+            where={"id": purge_id},
+            data={"status": "FAILED", "error": str(e)}
+        )
+        return
+    finally:
+        if posts:
+            for post in posts:
+                trending_posts.remove(post["id"])
+            feed_cache.invalidate()
+
+    await db.userpurge.update(
+        where={"id": purge_id},
+        data={"status": "DONE", "error": None, "finishedAt": datetime.now(timezone.utc)}
+    )
+    stats_cache.request_refresh()
+    lawyer_facets.reload(db)
+    specialization_index.reload(db)
+
+
+async def resume_user_purges(db: Prisma) -> None:
+    """Claim and enqueue purges interrupted by a restart or failed earlier"""
+    for purge in await _claim(db):
+        job_runner.enqueue("default", _run_purge, db, purge["id"], purge["user_id"])
+
+
+async def run_purge_resumer(db: Prisma) -> None:
+    """Resume loop, runs for the lifetime of the app"""
+    while True:
+        try:
+            await resume_user_purges(db)
+        except Exception as e:
+            print(f"⚠️ User purge resume failed: {e}")
+        await asyncio.sleep(settings.PURGE_LOCK_TIMEOUT_SECONDS)
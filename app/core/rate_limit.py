@@ -0,0 +1,155 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from fastapi import HTTPException, status
+from app.config import settings
+
+
+class RateLimitStore(ABC):
+    """Storage for fixed-window hit counters"""
+
+    @abstractmethod
+    async def increment(self, key: str, window: int) -> tuple[int, int]:
+        """Count a hit in `window`, return (hits in window, hits in window - 1)"""
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """In-process counters (each worker limits independently)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters: dict[str, tuple[int, int, int]] = {}
+
+    async def increment(self, key: str, window: int) -> tuple[int, int]:
+        entry = self._counters.get(key)
+        if entry is None or entry[0] < window - 1:
+            current, previous = 0, 0
+        elif entry[0] == window - 1:
+            current, previous = 0, entry[1]
+        else:
+            current, previous = entry[1], entry[2]
+
+        current += 1
+        self._counters[key] = (window, current, previous)
+
+        if len(self._counters) > self.max_keys:
+            self._prune(window)
+
+        return current, previous
+
+    def _prune(self, window: int) -> None:
+        stale = [key for key, entry in self._counters.items() if entry[0] < window - 1]
+        for key in stale:
+            del self._counters[key]
+
+
+class PostgresRateLimitStore(RateLimitStore):
+    """Counters in the rate_limit_counters table, shared by all workers"""
+
+    # Delete expired windows every this many hits
+    CLEANUP_EVERY = 1000
+
+    def __init__(self):
+        self._hits = 0
+
+    async def increment(self, key: str, window: int) -> tuple[int, int]:
+        from app.database import db
+
+        rows = await db.query_raw(
+            """
+            WITH cur AS (
+                INSERT INTO rate_limit_counters (key, window_start, count)
+                VALUES ($1, $2, 1)
+                ON CONFLICT (key, window_start)
+                DO UPDATE SET count = rate_limit_counters.count + 1
+                RETURNING count
+            )
+            SELECT
+                (SELECT count FROM cur) AS current,
+                COALESCE(
+                    (SELECT count FROM rate_limit_counters WHERE key = $1 AND window_start = $3),
+                    0
+                ) AS previous
+            """,
+            key,
+            window,
+            window - 1,
+        )
+
+        self._hits += 1
+        if self._hits % self.CLEANUP_EVERY == 0:
+            await db.execute_raw(
+                "DELETE FROM rate_limit_counters WHERE window_start < $1",
+                window - 1,
+            )
+
+        return int(rows[0]["current"]), int(rows[0]["previous"])
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: weights the previous window by how much of it still overlaps"""
+
+    def __init__(self, store: RateLimitStore, limit: int, window_seconds: int):
+        self.store = store
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def hit(self, key: str) -> Optional[int]:
+        """Record a hit; return seconds to wait if over the limit, else None"""
+        now = time.time()
+        window = int(now // self.window_seconds)
+        elapsed = now - window * self.window_seconds
+
+        current, previous = await self.store.increment(key, window)
+        estimated = previous * (1 - elapsed / self.window_seconds) + current
+        if estimated <= self.limit:
+            return None
+
+        return max(1, math.ceil(self.window_seconds - elapsed))
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Build the store selected by RATE_LIMIT_STORE"""
+    if settings.RATE_LIMIT_STORE == "postgres":
+        return PostgresRateLimitStore()
+    if settings.RATE_LIMIT_STORE == "memory":
+        return MemoryRateLimitStore()
+    raise ValueError(f"Unknown RATE_LIMIT_STORE: {settings.RATE_LIMIT_STORE}")
+
+
+class LoginRateLimiter:
+    """
+    Login throttling per IP, per (email, IP) and per email.
+
+    The tight (email, IP) limit stops guessing one account from one address
+    without letting others lock a victim out; the looser per-email limit
+    caps guessing one account from many addresses. Client IPs are only
+    correct behind a proxy when uvicorn trusts its forwarded headers (see
+    FORWARDED_ALLOW_IPS in DEPLOYMENT.md).
+    """
+
+    def __init__(self, store: RateLimitStore):
+        window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+        self.by_ip = SlidingWindowLimiter(store, settings.LOGIN_RATE_LIMIT_PER_IP, window)
+        self.by_email_ip = SlidingWindowLimiter(store, settings.LOGIN_RATE_LIMIT_PER_EMAIL_IP, window)
+        self.by_email = SlidingWindowLimiter(store, settings.LOGIN_RATE_LIMIT_PER_EMAIL, window)
+
+    async def check(self, ip: str, email: str) -> None:
+        """Count a login attempt, raise 429 if any limit is exceeded"""
+        email = email.lower()
+        retry_after = await self.by_ip.hit(f"login:ip:{ip}")
+        if retry_after is None:
+            retry_after = await self.by_email_ip.hit(f"login:email-ip:{email}:{ip}")
+        if retry_after is None:
+            retry_after = await self.by_email.hit(f"login:email:{email}")
+
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+
+login_rate_limiter = LoginRateLimiter(create_rate_limit_store())
@@ -0,0 +1,297 @@
+"""
+Related posts from TF-IDF similarity over title and content.
+
+Terms are feature-hashed into FEATURE_DIM columns, weighted by TF-IDF and
+L2-normalized, so cosine similarity is a matrix product. Each run only
+recomputes neighbours for posts changed since the previous run (by
+content_updated_at, which page views do not touch), merges those posts into
+the stored lists of the others, and refills lists that lost entries to
+deleted or unpublished posts. Incremental runs still load and vectorize
+every published post, since TF-IDF weights span the whole corpus: only the
+similarity computation and writes are incremental.
+
+Only one refresh runs at a time (a Postgres advisory lock); a run started
+while another holds it is skipped.
+
+Document frequencies drift as posts are added, and incremental runs only
+re-weight changed posts: run with --full periodically (e.g. nightly) to
+re-weight every post.
+
+Run from cron (or POST /admin/related-posts/refresh):
+python -m app.core.related [--full]
+"""
+import argparse
+import asyncio
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+import numpy as np
+from prisma import Prisma
+
+FEATURE_DIM = 2 ** 11
+NEIGHBOURS = 10
+TITLE_WEIGHT = 3
+LOAD_BATCH_SIZE = 2000
+SIMILARITY_CHUNK = 256
+# Above this share of changed posts a full rebuild is cheaper than merging
+FULL_REBUILD_RATIO = 0.5
+# Advisory lock key, held for the duration of a refresh
+LOCK_KEY = zlib.crc32(b"related_posts")
+# The lock lives in a transaction, which Prisma rolls back (releasing the lock) after this
+LOCK_TIMEOUT = timedelta(hours=1)
+
+_TOKEN = re.compile(r"\w{2,}")
+
+
+@dataclass
+class Corpus:
+    ids: np.ndarray  # post ids, ascending
+    vectors: np.ndarray  # len(ids) x FEATURE_DIM, rows L2-normalized
+    changed: np.ndarray  # bool mask of posts updated since the last run
+
+
+def _tokens(text: str) -> list[str]:
+    return [token for token in _TOKEN.findall(text.casefold()) if not token.isdigit()]
+
+
+def build_vectors(documents: list[str]) -> np.ndarray:
+    """Hashed TF-IDF vectors, one L2-normalized row per document"""
+    buckets: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    for row, document in enumerate(documents):
+        for token in _tokens(document):
+            col = buckets.get(token)
+            if col is None:
+                col = buckets[token] = zlib.crc32(token.encode()) % FEATURE_DIM
+            rows.append(row)
+            cols.append(col)
+
+    counts = np.zeros((len(documents), FEATURE_DIM), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), 1.0)
+
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(documents)) / (1 + df)).astype(np.float32) + 1
+    vectors = np.log1p(counts, out=counts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_n(scores: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and values of the n largest entries per row, highest first"""
+    n = min(n, scores.shape[1])
+    if n == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty
+    index = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    values = np.take_along_axis(scores, index, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(index, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def compute_neighbours(
+    corpus: Corpus,
+    stored: dict[int, list[tuple[int, float]]],
+    n: int = NEIGHBOURS,
+) -> dict[int, list[tuple[int, float]]]:
+    """
+    New neighbour lists (post id -> [(related id, score)]) for every post
+    whose list changes: the changed posts themselves, unchanged posts a
+    changed post now ranks among, and unchanged posts with short lists.
+    """
+    vectors, ids = corpus.vectors, corpus.ids
+    changed = np.flatnonzero(corpus.changed)
+    changed_ids = set(ids[changed].tolist())
+    updates: dict[int, list[tuple[int, float]]] = {}
+
+    # Unchanged posts with short lists (neighbours deleted or unpublished) are recomputed in full
+    wanted = min(n, len(ids) - 1)
+    short = np.asarray(
+        [col for col in np.flatnonzero(~corpus.changed) if len(stored.get(int(ids[col]), [])) < wanted],
+        dtype=np.int64,
+    )
+    for start in range(0, len(short), SIMILARITY_CHUNK):
+        rows = short[start:start + SIMILARITY_CHUNK]
+        scores = vectors[rows] @ vectors.T
+        scores[np.arange(len(rows)), rows] = -np.inf
+        index, values = _top_n(scores, n)
+        for row, cols, vals in zip(rows, index, values):
+            updates[int(ids[row])] = [(int(ids[c]), float(v)) for c, v in zip(cols, vals) if v > 0]
+
+    # Best changed-post candidates per column, merged across chunks
+    candidate_index = np.empty((0, len(ids)), dtype=np.int64)
+    candidate_score = np.empty((0, len(ids)), dtype=np.float32)
+
+    for start in range(0, len(changed), SIMILARITY_CHUNK):
+        rows = changed[start:start + SIMILARITY_CHUNK]
+        scores = vectors[rows] @ vectors.T
+        scores[np.arange(len(rows)), rows] = -np.inf  # not related to itself
+
+        index, values = _top_n(scores, n)
+        for row, cols, vals in zip(rows, index, values):
+            updates[int(ids[row])] = [(int(ids[c]), float(v)) for c, v in zip(cols, vals) if v > 0]
+
+        column_index, column_score = _top_n(scores.T, n)
+        candidate_index = np.concatenate([candidate_index, rows[column_index].T])
+        candidate_score = np.concatenate([candidate_score, column_score.T])
+        if len(candidate_index) > n:
+            keep, _ = _top_n(candidate_score.T, n)
+            candidate_index = np.take_along_axis(candidate_index, keep.T, axis=0)
+            candidate_score = np.take_along_axis(candidate_score, keep.T, axis=0)
+
+    if not len(changed):
+        return updates
+
+    for col in np.flatnonzero(~corpus.changed):
+        post_id = int(ids[col])
+        if post_id in updates:
+            continue
+        old = stored.get(post_id, [])
+        candidates = [(int(ids[i]), float(s)) for i, s in zip(candidate_index[:, col], candidate_score[:, col]) if s > 0]
+        floor = old[-1][1] if len(old) >= n else 0.0
+        if not any(related in changed_ids for related, _ in old) and not any(s > floor for _, s in candidates):
+            continue
+        merged = [(related, score) for related, score in old if related not in changed_ids] + candidates
+        merged.sort(key=lambda item: -item[1])
+        updates[post_id] = merged[:n]
+
+    return updates
+
+
+# Database
+
+async def _load_corpus(db: Prisma, since: Optional[datetime]) -> Corpus:
+    ids: list[int] = []
+    documents: list[str] = []
+    changed: list[bool] = []
+    last_id = 0
+    while True:
+        rows = await db.query_raw(
+            """
+            SELECT id, title, content, content_updated_at >= COALESCE($2::timestamp, '-infinity') AS changed
+            FROM blog_posts
+            WHERE is_published AND id > $1
+            ORDER BY id
+            LIMIT $3
+            """,
+            last_id,
+            since.replace(tzinfo=None).isoformat() if since else None,
+            LOAD_BATCH_SIZE,
+        )
+        if not rows:
+            break
+        for row in rows:
+            ids.append(row["id"])
+            documents.append(f"{row['title']} " * TITLE_WEIGHT + row["content"])
+            changed.append(bool(row["changed"]))
+        last_id = rows[-1]["id"]
+
+    vectors = await asyncio.to_thread(build_vectors, documents)
+    return Corpus(np.asarray(ids, dtype=np.int64), vectors, np.asarray(changed, dtype=bool))
+
+
+async def _load_stored(db: Prisma) -> dict[int, list[tuple[int, float]]]:
+    stored: dict[int, list[tuple[int, float]]] = {}
+    for row in await db.query_raw("SELECT post_id, related_id, score FROM related_posts ORDER BY post_id, rank"):
+        stored.setdefault(row["post_id"], []).append((row["related_id"], row["score"]))
+    return stored
+
+
+async def _save(db: Prisma, updates: dict[int, list[tuple[int, float]]]) -> None:
+    post_ids = list(updates)
+    for start in range(0, len(post_ids), LOAD_BATCH_SIZE):
+        batch = post_ids[start:start + LOAD_BATCH_SIZE]
+        rows = [(post_id, related, score, rank) for post_id in batch for rank, (related, score) in enumerate(updates[post_id])]
+        async with db.tx() as tx:
+            await tx.execute_raw("DELETE FROM related_posts WHERE post_id = ANY($1::int[])", batch)
+            if rows:
+                await tx.execute_raw(
+                    """
+                    INSERT INTO related_posts (post_id, related_id, score, rank)
+                    SELECT * FROM unnest($1::int[], $2::int[], $3::float8[], $4::int[])
+                    """,
+                    *(list(column) for column in zip(*rows)),
+                )
+
+
+async def refresh_running(db: Prisma) -> bool:
+    rows = await db.query_raw(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_locks
+            WHERE locktype = 'advisory' AND classid = 0 AND objid = $1::oid AND objsubid = 1
+        ) AS running
+        """,
+        LOCK_KEY,
+    )
+    return bool(rows[0]["running"])
+
+
+async def refresh_related_posts(db: Prisma, full: bool = False) -> Optional[int]:
+    """
+    Recompute neighbour lists affected by posts changed since the last run
+    (every published post is still vectorized); returns lists written, or
+    None if another refresh is running.
+    """
+    # Transaction-level lock: Prisma pools connections, so a session lock
+    # could be taken and released on different connections
+    async with db.tx(timeout=LOCK_TIMEOUT) as lock:
+        rows = await lock.query_raw("SELECT pg_try_advisory_xact_lock($1::bigint) AS locked", LOCK_KEY)
+        if not rows[0]["locked"]:
+            return None
+        return await _refresh(db, full)
+
+
+async def _refresh(db: Prisma, full: bool) -> int:
+    run = await db.relatedpostsrun.create(data={})
+    last = await db.relatedpostsrun.find_first(
+        where={"finishedAt": {"not": None}},
+        order={"startedAt": "desc"}
+    )
+    since = None if full or last is None else last.startedAt
+
+    # Drop lists of, and links to, deleted or unpublished posts
+    await db.execute_raw(
+        """
+        DELETE FROM related_posts r
+        WHERE NOT EXISTS (SELECT 1 FROM blog_posts p WHERE p.id = r.post_id AND p.is_published)
+           OR NOT EXISTS (SELECT 1 FROM blog_posts p WHERE p.id = r.related_id AND p.is_published)
+        """
+    )
+
+    corpus = await _load_corpus(db, since)
+    if len(corpus.ids) and corpus.changed.mean() > FULL_REBUILD_RATIO:
+        corpus.changed[:] = True
+    stored = {} if corpus.changed.all() else await _load_stored(db)
+
+    updates = await asyncio.to_thread(compute_neighbours, corpus, stored)
+    await _save(db, updates)
+
+    await db.relatedpostsrun.update(
+        where={"id": run.id},
+        data={"finishedAt": datetime.utcnow(), "updatedPosts": len(updates)}
+    )
+    return len(updates)
+
+
+async def _main(full: bool) -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    await connect_db()
+    try:
+        updated = await refresh_related_posts(db, full)
+    finally:
+        await disconnect_db()
+    if updated is None:
+        print("⚠️ Another related posts refresh is running, skipped")
+    else:
+        print(f"✅ Updated related posts for {updated} posts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh related-post recommendations")
+    parser.add_argument("--full", action="store_true", help="recompute every post, not only changed ones")
+    args = parser.parse_args()
+    asyncio.run(_main(args.full))
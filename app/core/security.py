@@ -1,11 +1,23 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
+import hashlib
+import secrets
+import time
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes made with any other cost are flagged by
+# needs_update() so they get rehashed on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -13,11 +25,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    return pwd_context.hash(secrets.token_urlsafe(16))
+
+
+def dummy_verify_password(plain_password: str) -> bool:
+    """Spend the same time as verify_password when there is no hash to check (always False)"""
+    pwd_context.verify(plain_password, _dummy_password_hash())
+    return False
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a stored hash uses outdated parameters"""
+    return pwd_context.needs_update(hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -33,10 +61,78 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_refresh_token() -> str:
+    """Create an opaque refresh token"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage (tokens are high-entropy, so SHA-256 is enough)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, keyed by token digest"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if time.time() >= expires_at:
+            # Expired entries are dropped on access
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(payload)
+
+    def set(self, token: str, payload: dict) -> None:
+        if self.maxsize <= 0:
+            return
+
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            # Without an expiry we can't know when to stop trusting it
+            return
+
+        key = hashlib.sha256(token.encode()).digest()
+        self._entries[key] = (float(exp), dict(payload))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode JWT access token"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
         return None
+
+    # python-jose accepts a token during its final second, we don't
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and time.time() >= exp:
+        return None
+
+    token_cache.set(token, payload)
+    return payload
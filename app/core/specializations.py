@@ -0,0 +1,185 @@
+"""
+Normalized lawyer specializations.
+
+Free-form LawyerProfile.specialization text is split into tags with a
+canonical slug ("Family Law", "family-law" and "FAMILY_LAW" all become
+"family-law"), stored in specialization_tags / lawyer_specializations, and
+mirrored in an in-memory inverted index (tag -> profile ids). The index is
+updated by this worker's profile writes and reloaded every
+SPECIALIZATION_INDEX_REFRESH_SECONDS to pick up other workers' writes.
+
+Tag existing profiles with:
+python -m app.core.specializations --backfill
+"""
+import argparse
+import asyncio
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Iterable
+from prisma import Prisma
+from app.config import settings
+from app.core.jobs import job_runner
+
+# Separators between tags in the free-form field (incl. the Persian comma)
+_SEPARATORS = re.compile(r"[,;/|،]+")
+_NON_WORD = re.compile(r"[^\w]+")
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def specialization_slug(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _NON_WORD.sub("-", text.replace("_", " ")).strip("-")
+
+
+def normalize_specializations(text: str) -> list[tuple[str, str]]:
+    """Split free-form text into unique (slug, display name) tags, in order"""
+    tags: dict[str, str] = {}
+    for part in _SEPARATORS.split(text or ""):
+        name = " ".join(unicodedata.normalize("NFKC", part).split())
+        slug = specialization_slug(name)
+        if slug and slug not in tags:
+            tags[slug] = name
+    return list(tags.items())
+
+
+class SpecializationIndex:
+    """In-memory inverted index of specialization tags"""
+
+    def __init__(self):
+        self._profiles: dict[str, set[int]] = defaultdict(set)
+        self._tags: dict[int, set[str]] = {}
+        self._names: dict[str, str] = {}
+
+    async def load(self, db: Prisma) -> None:
+        rows = await db.query_raw(
+            """
+            SELECT ls.profile_id, t.slug, t.name
+            FROM lawyer_specializations ls
+            JOIN specialization_tags t ON t.id = ls.tag_id
+            """
+        )
+        profiles: dict[str, set[int]] = defaultdict(set)
+        tags: dict[int, set[str]] = defaultdict(set)
+        names: dict[str, str] = {}
+        for row in rows:
+            profiles[row["slug"]].add(row["profile_id"])
+            tags[row["profile_id"]].add(row["slug"])
+            names[row["slug"]] = row["name"]
+        self._profiles, self._tags, self._names = profiles, dict(tags), names
+
+    def reload(self, db: Prisma) -> None:
+        job_runner.enqueue("default", self.load, db)
+
+    async def run(self, db: Prisma) -> None:
+        """Reload loop after the startup load, runs for the lifetime of the app"""
+        while True:
+            await asyncio.sleep(settings.SPECIALIZATION_INDEX_REFRESH_SECONDS)
+            try:
+                await self.load(db)
+            except Exception as e:
+                print(f"⚠️ Specialization index reload failed: {e}")
+
+    def set_profile(self, profile_id: int, tags: Iterable[tuple[str, str]]) -> None:
+        self.remove_profile(profile_id)
+        slugs = set()
+        for slug, name in tags:
+            slugs.add(slug)
+            self._profiles[slug].add(profile_id)
+            self._names.setdefault(slug, name)
+        self._tags[profile_id] = slugs
+
+    def remove_profile(self, profile_id: int) -> None:
+        for slug in self._tags.pop(profile_id, ()):
+            ids = self._profiles.get(slug)
+            if ids is not None:
+                ids.discard(profile_id)
+                if not ids:
+                    del self._profiles[slug]
+
+    def match(self, slugs: Iterable[str], match_all: bool = True) -> set[int]:
+        """Profile ids tagged with all (AND) or any (OR) of the slugs"""
+        sets = [self._profiles.get(slug, set()) for slug in set(slugs)]
+        if not sets:
+            return set()
+        if match_all:
+            sets.sort(key=len)
+            return set(sets[0]).intersection(*sets[1:])
+        return set().union(*sets)
+
+    def name(self, slug: str) -> str:
+        return self._names.get(slug, slug)
+
+    def tags(self) -> list[dict]:
+        """All tags with their profile counts, most used first"""
+        return sorted(
+            (
+                {"slug": slug, "name": self._names.get(slug, slug), "count": len(ids)}
+                for slug, ids in self._profiles.items()
+            ),
+            key=lambda tag: (-tag["count"], tag["slug"])
+        )
+
+
+specialization_index = SpecializationIndex()
+
+
+async def sync_profile_specializations(db: Prisma, profile_id: int, specialization: str) -> None:
+    """Replace a profile's tag links with the tags parsed from `specialization`"""
+    tags = normalize_specializations(specialization)
+    slugs = [slug for slug, _ in tags]
+
+    async with db.tx() as tx:
+        await tx.lawyerspecialization.delete_many(where={"profileId": profile_id})
+        if tags:
+            await tx.specializationtag.create_many(
+                data=[{"slug": slug, "name": name} for slug, name in tags],
+                skip_duplicates=True
+            )
+            rows = await tx.specializationtag.find_many(where={"slug": {"in": slugs}})
+            await tx.lawyerspecialization.create_many(
+                data=[{"profileId": profile_id, "tagId": row.id} for row in rows],
+                skip_duplicates=True
+            )
+
+    specialization_index.set_profile(profile_id, tags)
+
+
+async def backfill_specializations(db: Prisma) -> int:
+    """Tag every profile from its free-form specialization, in id-ordered batches"""
+    done = 0
+    last_id = 0
+    while True:
+        profiles = await db.lawyerprofile.find_many(
+            where={"id": {"gt": last_id}},
+            take=BACKFILL_BATCH_SIZE,
+            order={"id": "asc"}
+        )
+        if not profiles:
+            return done
+        for profile in profiles:
+            await sync_profile_specializations(db, profile.id, profile.specialization)
+        done += len(profiles)
+        last_id = profiles[-1].id
+
+
+async def _main() -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    await connect_db()
+    try:
+        done = await backfill_specializations(db)
+    finally:
+        await disconnect_db()
+    print(f"✅ Tagged {done} lawyer profiles")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain normalized lawyer specializations")
+    parser.add_argument("--backfill", action="store_true", help="tag all existing profiles")
+    args = parser.parse_args()
+    if args.backfill:
+        asyncio.run(_main())
+    else:
+        parser.print_help()
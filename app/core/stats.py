@@ -0,0 +1,109 @@
+import asyncio
+from enum import Enum
+from datetime import datetime, timezone
+from typing import Optional
+from prisma import Prisma
+from app.config import settings
+from app.core.pagination import EXACT_COUNT_THRESHOLD, table_estimate
+from app.schemas.stats import AdminStats, LawyerCounts
+
+
+def _status_key(value) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+class StatsCache:
+    """
+    Admin dashboard totals kept in memory.
+
+    Refreshed from the database every STATS_REFRESH_SECONDS and nudged by the
+    write handlers in between, so reading it never touches the database.
+    """
+
+    def __init__(self):
+        self._stats = AdminStats()
+        self._refresh_requested = asyncio.Event()
+
+    def snapshot(self) -> AdminStats:
+        return self._stats.model_copy(deep=True)
+
+    async def refresh(self, db: Prisma) -> None:
+        users = await table_estimate(db, "users")
+        if users < EXACT_COUNT_THRESHOLD:
+            users = await db.user.count()
+
+        lawyers = LawyerCounts()
+        for row in await db.lawyerprofile.group_by(["isVerified"], count=True):
+            if row["isVerified"]:
+                lawyers.verified = row["_count"]["_all"]
+            else:
+                lawyers.unverified = row["_count"]["_all"]
+
+        transactions = {
+            _status_key(row["status"]): row["_count"]["_all"]
+            for row in await db.transaction.group_by(["status"], count=True)
+        }
+        posts = {
+            row["categoryId"]: row["_count"]["_all"]
+            for row in await db.blogpost.group_by(["categoryId"], count=True)
+        }
+
+        self._stats = AdminStats(
+            users=users,
+            lawyers=lawyers,
+            transactionsByStatus=transactions,
+            postsByCategory=posts,
+            refreshedAt=datetime.now(timezone.utc),
+        )
+
+    def request_refresh(self) -> None:
+        """Refresh as soon as possible (for writes too broad to adjust, e.g. cascades)"""
+        self._refresh_requested.set()
+
+    async def run(self, db: Prisma) -> None:
+        """Refresh loop, runs for the lifetime of the app"""
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:
+                print(f"⚠️ Stats refresh failed: {e}")
+            try:
+                await asyncio.wait_for(self._refresh_requested.wait(), settings.STATS_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._refresh_requested.clear()
+
+    # Incremental adjustments from write handlers
+
+    def user_created(self, count: int = 1) -> None:
+        self._stats.users += count
+
+    def lawyer_created(self) -> None:
+        self._stats.lawyers.unverified += 1
+
+    def lawyer_verification_changed(self, verified: bool, count: int = 1) -> None:
+        if verified:
+            self._stats.lawyers.verified += count
+            self._stats.lawyers.unverified = max(0, self._stats.lawyers.unverified - count)
+        else:
+            self._stats.lawyers.unverified += count
+            self._stats.lawyers.verified = max(0, self._stats.lawyers.verified - count)
+
+    def transaction_status_changed(self, old: Optional[str], new: Optional[str]) -> None:
+        counts = self._stats.transactionsByStatus
+        old = _status_key(old) if old is not None else None
+        new = _status_key(new) if new is not None else None
+        if old is not None:
+            counts[old] = max(0, counts.get(old, 0) - 1)
+        if new is not None:
+            counts[new] = counts.get(new, 0) + 1
+
+    def post_category_changed(self, old: Optional[int], new: Optional[int]) -> None:
+        counts = self._stats.postsByCategory
+        if old is not None:
+            counts[old] = max(0, counts.get(old, 0) - 1)
+        if new is not None:
+            counts[new] = counts.get(new, 0) + 1
+
+
+stats_cache = StatsCache()
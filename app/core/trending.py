@@ -0,0 +1,191 @@
+"""
+Trending blog posts by exponentially decayed view counts.
+
+Each view adds 1 to a post's score, and scores halve every
+TRENDING_HALF_LIFE_HOURS. Scores are kept as log(score) relative to a fixed
+epoch, which only grows with views: ranking never needs re-decaying, and the
+per-category top-K sets only ever admit posts, never reorder them from decay.
+
+Views are accumulated per worker and merged into the trending_scores table
+every TRENDING_PERSIST_SECONDS, after which the merged table is reloaded.
+"""
+import asyncio
+import heapq
+import math
+import time
+from typing import Optional
+from prisma import Prisma
+from app.config import settings
+
+EPOCH = 1704067200  # 2024-01-01T00:00:00Z
+# Scores below this are dropped when persisting, to keep the table compact
+MIN_SCORE = 0.01
+
+_ALL = None  # top-K key for all categories
+
+
+def _rate() -> float:
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow"""
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+
+class _TopK:
+    """The K largest (key, post id) pairs; keys only increase"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.members: dict[int, float] = {}
+        self._heap: list[tuple[float, int]] = []
+
+    def offer(self, post_id: int, key: float) -> None:
+        if post_id in self.members:
+            self.members[post_id] = key
+            heapq.heappush(self._heap, (key, post_id))
+            if len(self._heap) > 4 * self.k:
+                self._heap = [(v, i) for i, v in self.members.items()]
+                heapq.heapify(self._heap)
+            return
+        if len(self.members) >= self.k and key <= self._min():
+            return
+        self.members[post_id] = key
+        heapq.heappush(self._heap, (key, post_id))
+        if len(self.members) > self.k:
+            self._min()
+            _, evicted = heapq.heappop(self._heap)
+            del self.members[evicted]
+
+    def discard(self, post_id: int) -> None:
+        self.members.pop(post_id, None)
+
+    def _min(self) -> float:
+        # Drop stale entries (superseded keys or discarded posts) from the heap top
+        while self._heap and self.members.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else float("-inf")
+
+
+class TrendingPosts:
+    def __init__(self):
+        self._scores: dict[int, tuple[float, int]] = {}  # post id -> (log score, category id)
+        self._top: dict[Optional[int], _TopK] = {}
+        self._pending: dict[int, float] = {}  # post id -> log score of views not yet persisted
+
+    def _offer(self, post_id: int, key: float, category_id: int) -> None:
+        for bucket in (_ALL, category_id):
+            top = self._top.get(bucket)
+            if top is None:
+                top = self._top[bucket] = _TopK(settings.TRENDING_TOP_K)
+            top.offer(post_id, key)
+
+    def record_view(self, post_id: int, category_id: int, at: Optional[float] = None) -> None:
+        view = _rate() * ((at or time.time()) - EPOCH)
+
+        current = self._scores.get(post_id)
+        if current is not None and current[1] != category_id:
+            self._discard(post_id, current[1])
+        key = view if current is None else _log_add(current[0], view)
+        self._scores[post_id] = (key, category_id)
+        self._offer(post_id, key, category_id)
+
+        pending = self._pending.get(post_id)
+        self._pending[post_id] = view if pending is None else _log_add(pending, view)
+
+    def _discard(self, post_id: int, category_id: int) -> None:
+        for bucket in (_ALL, category_id):
+            top = self._top.get(bucket)
+            if top is not None:
+                top.discard(post_id)
+
+    def remove(self, post_id: int) -> None:
+        """Forget a deleted or unpublished post"""
+        current = self._scores.pop(post_id, None)
+        self._pending.pop(post_id, None)
+        if current is not None:
+            self._discard(post_id, current[1])
+
+    def top(self, category_id: Optional[int] = None, limit: int = 10) -> list[tuple[int, float]]:
+        """(post id, current score) pairs, highest first"""
+        top = self._top.get(category_id)
+        if top is None:
+            return []
+        now_key = _rate() * (time.time() - EPOCH)
+        ranked = heapq.nlargest(limit, top.members.items(), key=lambda item: item[1])
+        return [(post_id, math.exp(key - now_key)) for post_id, key in ranked]
+
+    # Persistence
+
+    async def load(self, db: Prisma) -> None:
+        rows = await db.query_raw(
+            """
+            SELECT t.post_id, t.score, p.category_id
+            FROM trending_scores t
+            JOIN blog_posts p ON p.id = t.post_id AND p.is_published
+            """
+        )
+        scores = {row["post_id"]: (row["score"], row["category_id"]) for row in rows}
+        # Views recorded since the last flush are not in the table yet
+        for post_id, key in self._pending.items():
+            if post_id in scores:
+                stored, category_id = scores[post_id]
+                scores[post_id] = (_log_add(stored, key), category_id)
+            elif post_id in self._scores:
+                scores[post_id] = self._scores[post_id]
+
+        self._scores = scores
+        self._top = {}
+        for post_id, (key, category_id) in scores.items():
+            self._offer(post_id, key, category_id)
+
+    async def persist(self, db: Prisma) -> None:
+        """Merge pending views into the table, prune faded scores, then reload the merged table"""
+        pending, self._pending = self._pending, {}
+        if pending:
+            try:
+                await db.execute_raw(
+                    """
+                    INSERT INTO trending_scores (post_id, score, updated_at)
+                    SELECT v.post_id, v.score, now()
+                    FROM unnest($1::int[], $2::float8[]) AS v(post_id, score)
+                    WHERE EXISTS (SELECT 1 FROM blog_posts p WHERE p.id = v.post_id)
+                    ON CONFLICT (post_id) DO UPDATE SET
+                        score = GREATEST(trending_scores.score, EXCLUDED.score)
+                              + ln(1 + exp(-abs(trending_scores.score - EXCLUDED.score))),
+                        updated_at = now()
+                    """,
+                    list(pending),
+                    list(pending.values()),
+                )
+            except Exception:
+                # Keep the views for the next attempt
+                for post_id, key in pending.items():
+                    current = self._pending.get(post_id)
+                    self._pending[post_id] = key if current is None else _log_add(current, key)
+                raise
+
+        await db.execute_raw(
+            "DELETE FROM trending_scores WHERE score < $1",
+            _rate() * (time.time() - EPOCH) + math.log(MIN_SCORE),
+        )
+        await self.load(db)
+
+    async def run(self, db: Prisma) -> None:
+        """Load, then persist periodically for the lifetime of the app"""
+        try:
+            await self.load(db)
+        except Exception as e:
+            print(f"⚠️ Trending scores load failed: {e}")
+        while True:
+            await asyncio.sleep(settings.TRENDING_PERSIST_SECONDS)
+            try:
+                await self.persist(db)
+            except Exception as e:
+                print(f"⚠️ Trending scores persist failed: {e}")
+
+
+trending_posts = TrendingPosts()
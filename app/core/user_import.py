@@ -0,0 +1,206 @@
+"""
+Bulk user import from CSV or NDJSON.
+
+Usage: python -m app.core.user_import users.csv|users.ndjson
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, BinaryIO, Optional
+from passlib.hash import bcrypt
+from prisma import Prisma
+from pydantic import ValidationError
+from app.config import settings
+from app.core.stats import stats_cache
+from app.schemas.user import UserCreate
+
+IMPORT_BATCH_SIZE = 500
+# Uploads above this are spooled to disk
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _hash_passwords(passwords: list[str], rounds: int) -> list[str]:
+    """Runs in a worker process"""
+    hasher = bcrypt.using(rounds=rounds)
+    return [hasher.hash(password) for password in passwords]
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+
+async def hash_passwords_parallel(passwords: list[str]) -> list[str]:
+    """bcrypt-hash passwords across all cores"""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = _get_hash_pool()
+    workers = os.cpu_count() or 1
+    chunk = max(1, -(-len(passwords) // workers))
+    futures = [
+        loop.run_in_executor(pool, _hash_passwords, passwords[i:i + chunk], settings.BCRYPT_ROUNDS)
+        for i in range(0, len(passwords), chunk)
+    ]
+    return [hashed for part in await asyncio.gather(*futures) for hashed in part]
+
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> BinaryIO:
+    """
+    Read a request body to the end into a temporary file (rewound).
+
+    The body must be consumed before a StreamingResponse starts: from then on
+    Starlette listens for disconnects and swallows further body messages.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    async for chunk in chunks:
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
+
+
+async def parse_rows(file: BinaryIO, fmt: str) -> AsyncIterator[dict]:
+    """Decode a UTF-8 file into row dicts; fmt is 'csv' (with header) or 'ndjson'"""
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        if fmt == "ndjson":
+            for line in text:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"__error__": f"Invalid JSON: {e}"}
+            return
+
+        # One reader over the whole file, so quoted fields may contain newlines
+        header = None
+        for values in csv.reader(text):
+            if not any(value.strip() for value in values):
+                continue
+            if header is None:
+                header = values
+                continue
+            yield dict(zip(header, values))
+    finally:
+        text.detach()
+
+
+async def _import_batch(db: Prisma, batch: list[tuple[int, dict]], seen: set[str]) -> list[dict]:
+    results: list[dict] = []
+    valid: list[tuple[int, UserCreate]] = []
+
+    for row_number, row in batch:
+        if "__error__" in row:
+            results.append({"row": row_number, "status": "invalid", "error": row["__error__"]})
+            continue
+        try:
+            user = UserCreate.model_validate(row)
+        except ValidationError as e:
+            results.append({"row": row_number, "email": row.get("email"), "status": "invalid",
+                            "error": e.errors(include_url=False)[0]["msg"]})
+            continue
+        if user.email in seen:
+            results.append({"row": row_number, "email": user.email, "status": "duplicate"})
+            continue
+        seen.add(user.email)
+        valid.append((row_number, user))
+
+    # One IN query for the whole batch
+    existing = {
+        user.email
+        for user in await db.user.find_many(where={"email": {"in": [u.email for _, u in valid]}})
+    } if valid else set()
+
+    to_create = [(n, u) for n, u in valid if u.email not in existing]
+    results.extend({"row": n, "email": u.email, "status": "exists"} for n, u in valid if u.email in existing)
+
+    hashes = await hash_passwords_parallel([u.password for _, u in to_create])
+    inserted: set[str] = set()
+    if to_create:
+        # Emails registered concurrently since the check above are skipped, not reported as created
+        rows = await db.query_raw(
+            """
+            INSERT INTO users (email, password, full_name, role, updated_at)
+            SELECT v.email, v.password, v.full_name, v.role::"UserRole", now()
+            FROM unnest($1::text[], $2::text[], $3::text[], $4::text[]) AS v(email, password, full_name, role)
+            ON CONFLICT (email) DO NOTHING
+            RETURNING email
+            """,
+            [user.email for _, user in to_create],
+            hashes,
+            [user.fullName for _, user in to_create],
+            [user.role.value for _, user in to_create],
+        )
+        inserted = {row["email"] for row in rows}
+        stats_cache.user_created(len(inserted))
+    results.extend(
+        {"row": n, "email": u.email, "status": "created" if u.email in inserted else "exists"}
+        for n, u in to_create
+    )
+
+    results.sort(key=lambda r: r["row"])
+    return results
+
+
+async def import_users(db: Prisma, rows: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Create users from rows in batches, yielding one result per row"""
+    seen: set[str] = set()
+    batch: list[tuple[int, dict]] = []
+    row_number = 0
+    async for row in rows:
+        row_number += 1
+        batch.append((row_number, row))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            for result in await _import_batch(db, batch, seen):
+                yield result
+            batch = []
+    if batch:
+        for result in await _import_batch(db, batch, seen):
+            yield result
+
+
+async def import_results_ndjson(results: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async for result in results:
+        yield (json.dumps(result) + "\n").encode()
+
+
+async def _main(path: str) -> None:
+    from app.database import connect_db, disconnect_db, db
+
+    fmt = "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+    counts: dict[str, int] = {}
+    await connect_db()
+    try:
+        with open(path, "rb") as f:
+            async for result in import_users(db, parse_rows(f, fmt)):
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                if result["status"] != "created":
+                    print(json.dumps(result))
+    finally:
+        await disconnect_db()
+        shutdown_hash_pool()
+    print(f"\n✅ Import finished: {counts}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    asyncio.run(_main(sys.argv[1]))
@@ -1,9 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.config import settings
-from app.database import connect_db, disconnect_db
-from app.api import auth, users, lawyers, admin, transactions, ai_chats, blog_categories, blog_posts
+from app.database import db, connect_db, disconnect_db
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.stats import stats_cache
+from app.core.jobs import job_runner
+from app.core.purge import run_purge_resumer
+from app.core.user_import import shutdown_hash_pool
+from app.core.facets import lawyer_facets
+from app.core.specializations import specialization_index
+from app.core.trending import trending_posts
+from app.api import auth, users, lawyers, admin, transactions, ai_chats, blog_categories, blog_posts, feeds
 
 
 @asynccontextmanager
@@ -11,8 +21,26 @@ async def lifespan(app: FastAPI):
     """Lifespan events for FastAPI app"""
     # Startup
     await connect_db()
+    await job_runner.start(db)
+    await specialization_index.load(db)
+    stats_task = asyncio.create_task(stats_cache.run(db))
+    purge_task = asyncio.create_task(run_purge_resumer(db))
+    facets_task = asyncio.create_task(lawyer_facets.run(db))
+    specializations_task = asyncio.create_task(specialization_index.run(db))
+    trending_task = asyncio.create_task(trending_posts.run(db))
     yield
     # Shutdown
+    stats_task.cancel()
+    purge_task.cancel()
+    facets_task.cancel()
+    specializations_task.cancel()
+    trending_task.cancel()
+    try:
+        await trending_posts.persist(db)
+    except Exception as e:
+        print(f"⚠️ Trending scores persist failed: {e}")
+    await job_runner.drain(settings.JOB_DRAIN_TIMEOUT_SECONDS)
+    shutdown_hash_pool()
     await disconnect_db()
 
 
@@ -23,6 +51,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control (rate limits, in-flight cap and load shedding).
+# Added before CORS so rejections still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware, router=app.router)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,8 +62,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
+# Response compression, outermost so every response (including rejections) is covered
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -41,6 +77,7 @@ app.include_router(transactions.router)
 app.include_router(ai_chats.router)
 app.include_router(blog_categories.router)
 app.include_router(blog_posts.router)
+app.include_router(feeds.router)
 
 
 @app.get("/")
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+
+# Upper bound on ids in one bulk request
+MAX_BULK_IDS = 50_000
+
+
+class LawyerBulkFilter(BaseModel):
+    """Selects lawyer profiles for a bulk action"""
+    specialization: Optional[str] = None
+    minExperienceYears: Optional[int] = None
+    maxExperienceYears: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would select every lawyer on the platform
+        if not self.specialization and self.minExperienceYears is None and self.maxExperienceYears is None:
+            raise ValueError("Filter must set at least one criterion")
+        return self
+
+
+class LawyerBulkVerifyRequest(BaseModel):
+    """Bulk verify/unverify request: either explicit ids or a filter"""
+    ids: Optional[list[int]] = Field(default=None, max_length=MAX_BULK_IDS)
+    filter: Optional[LawyerBulkFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of 'ids' or 'filter'")
+        return self
+
+
+class UserBulkDeactivateRequest(BaseModel):
+    """Bulk user deactivation request"""
+    ids: list[int] = Field(max_length=MAX_BULK_IDS)
+
+
+class BulkUpdateResult(BaseModel):
+    """Result of a bulk update"""
+    updated: int
+    notFound: list[int] = []
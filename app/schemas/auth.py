@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from typing import Optional
 
 
 class LoginRequest(BaseModel):
@@ -10,9 +11,15 @@ class LoginRequest(BaseModel):
 class Token(BaseModel):
     """JWT token response"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Refresh token request schema"""
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     """Token payload data"""
     user_id: int
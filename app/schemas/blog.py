@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
+from app.schemas.user import UserSummary
 
 
 class BlogCategoryBase(BaseModel):
@@ -65,8 +66,24 @@ class BlogPostResponse(BlogPostBase):
     authorId: int
     publishedAt: Optional[datetime] = None
     viewCount: int
+    contentHtml: Optional[str] = None
+    autoExcerpt: Optional[str] = None
+    wordCount: int = 0
+    readingMinutes: int = 0
     createdAt: datetime
     updatedAt: datetime
+    author: Optional[UserSummary] = None  # with expand=author
+    category: Optional[BlogCategoryResponse] = None  # with expand=category
 
     class Config:
         from_attributes = True
+
+
+class TrendingPostResponse(BlogPostResponse):
+    """Blog post with its current decayed view score"""
+    trendingScore: float
+
+
+class RelatedPostResponse(BlogPostResponse):
+    """Blog post with its similarity to the requested post"""
+    similarity: float
@@ -1,7 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 from decimal import Decimal
+from app.schemas.user import UserSummary
 
 
 class LawyerProfileBase(BaseModel):
@@ -42,6 +43,35 @@ class LawyerProfileResponse(LawyerProfileBase):
     isVerified: bool
     createdAt: datetime
     updatedAt: datetime
+    user: Optional[UserSummary] = None  # with expand=user
 
     class Config:
         from_attributes = True
+
+
+class FacetValue(BaseModel):
+    """One facet value and its count"""
+    value: Union[bool, str]
+    label: Optional[str] = None
+    count: int
+
+
+class LawyerFacets(BaseModel):
+    """Facet counts for the lawyer directory"""
+    specialization: list[FacetValue]
+    experience: list[FacetValue]
+    verified: list[FacetValue]
+
+
+class LawyerSearchResponse(BaseModel):
+    """Faceted lawyer search response"""
+    total: int
+    results: list[LawyerProfileResponse]
+    facets: LawyerFacets
+
+
+class SpecializationTagResponse(BaseModel):
+    """Specialization tag with its profile count"""
+    slug: str
+    name: str
+    count: int
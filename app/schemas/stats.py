@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class LawyerCounts(BaseModel):
+    """Lawyer profile counts by verification status"""
+    verified: int = 0
+    unverified: int = 0
+
+
+class AdminStats(BaseModel):
+    """Admin dashboard totals (approximate between refreshes)"""
+    users: int = 0
+    lawyers: LawyerCounts = LawyerCounts()
+    transactionsByStatus: dict[str, int] = {}
+    postsByCategory: dict[int, int] = {}
+    refreshedAt: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 from decimal import Decimal
 from enum import Enum
@@ -50,3 +50,40 @@ class TransactionResponse(TransactionBase):
 
     class Config:
         from_attributes = True
+
+
+class CreditLedgerEntryResponse(BaseModel):
+    """Credit ledger entry response schema"""
+    id: int
+    userId: int
+    transactionId: Optional[int] = None
+    amount: Decimal
+    balance: Decimal
+    createdAt: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AnalyticsInterval(str, Enum):
+    """Analytics bucket size"""
+    DAY = "day"
+    WEEK = "week"
+
+
+class TransactionAnalyticsBucket(BaseModel):
+    """Transaction volume for one period, type and status"""
+    period: date
+    type: TransactionType
+    status: TransactionStatus
+    count: int
+    amount: Decimal
+
+
+class UserTransactionTotals(BaseModel):
+    """Lifetime transaction totals for one user, type and status"""
+    userId: int
+    type: TransactionType
+    status: TransactionStatus
+    count: int
+    amount: Decimal
@@ -37,3 +37,28 @@ class UserResponse(UserBase):
 
     class Config:
         from_attributes = True
+
+
+class UserSummary(BaseModel):
+    """Public user fields for expanded relations"""
+    id: int
+    fullName: str
+    avatar: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserPurgeResponse(BaseModel):
+    """User purge job status schema"""
+    id: int
+    userId: int
+    status: str
+    deletedRows: int
+    attempts: int = 0
+    error: Optional[str] = None
+    createdAt: datetime
+    finishedAt: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -15,6 +15,12 @@ else
     exit 1
 fi
 
+# Record credit that predates the ledger (idempotent)
+echo "Seeding credit ledger opening balances..."
+python -m app.core.ledger --seed-opening
+
 # Start the application
 echo "Starting Uvicorn server..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# Client IPs (rate limits) come from X-Forwarded-For, trusted only from FORWARDED_ALLOW_IPS
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 \
+    --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}"
@@ -0,0 +1,79 @@
+"""Micro-benchmark: CPU cost vs. bytes saved per encoding, and serving from the compressed cache"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.core.compression import ENCODERS, ResponseCompressor
+from app.core.content import render_post_fields
+from app.schemas.blog import BlogPostResponse
+
+ITERATIONS = 200
+RESPONSES_PER_SECOND = 1000
+
+WORDS = (
+    "contract void party capacity civil code article court ruling appeal tenant landlord lease "
+    "inheritance estate divorce custody employer employee dismissal notice damages liability "
+    "evidence witness claim defence judgment enforcement fee deadline registry property deed"
+).split()
+
+
+def paragraph(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=60)
+    words[rng.randrange(60)] = f"[article {rng.randint(1, 999)}](https://example.com/{rng.randint(1, 999)})"
+    return " ".join(words).capitalize() + ".\n\n"
+
+
+def blog_page() -> bytes:
+    """A 20-post page of /blog-posts, as JSON"""
+    now = datetime.now()
+    rng = random.Random(42)
+    posts = []
+    for i in range(20):
+        content = f"# Post {i}\n\n" + "".join(paragraph(rng) for _ in range(6))
+        posts.append(BlogPostResponse.model_validate({
+            "id": i, "categoryId": 1, "authorId": 1, "title": f"Contract law basics {i}", "slug": f"contract-law-{i}",
+            "content": content, "excerpt": None, "featuredImage": None, "isPublished": True,
+            "publishedAt": now, "viewCount": i, "createdAt": now, "updatedAt": now,
+            **render_post_fields(content),
+        }).model_dump_json())
+    return ("[" + ",".join(posts) + "]").encode()
+
+
+def bench(label: str, fn, size: int, body: bytes) -> None:
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        compressed = fn(body)
+    per_response = (time.process_time() - start) / ITERATIONS
+    saved = size - len(compressed)
+    print(
+        f"{label:12} {len(compressed):>8,} B ({len(compressed) / size:>5.1%})  "
+        f"{per_response * 1e6:>8.1f} us CPU  "
+        f"{per_response * RESPONSES_PER_SECOND:>5.2f} cores, "
+        f"{saved * RESPONSES_PER_SECOND / 1e6:>6.1f} MB/s saved at {RESPONSES_PER_SECOND:,} responses/s"
+    )
+
+
+def main():
+    body = blog_page()
+    print(f"response: {len(body):,} B\n")
+
+    for encoding, (compress, _) in ENCODERS.items():
+        bench(encoding, compress, len(body), body)
+
+    print()
+    for encoding in ENCODERS:
+        compressor = ResponseCompressor(max_bytes=32 * 1024 * 1024)
+        compressor.compress(body, encoding, cacheable=True)
+        bench(f"{encoding} cached", lambda data: compressor.compress(data, encoding, cacheable=True), len(body), body)
+
+
+if __name__ == "__main__":
+    main()
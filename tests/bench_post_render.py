@@ -0,0 +1,63 @@
+"""Micro-benchmark: rendering a post per page view vs. serving precomputed fields"""
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.core.content import render_post_fields
+from app.schemas.blog import BlogPostResponse
+
+ITERATIONS = 2000
+PAGE_VIEWS_PER_SECOND = 1000
+
+PARAGRAPH = (
+    "Under the **civil code**, a contract is void when one of the parties lacks capacity. "
+    "See [article 190](https://example.com/190) and the `notes` below for the exceptions "
+    "that courts have recognised over the years.\n\n"
+)
+CONTENT = "# Contract law basics\n\n" + "".join(
+    f"## Section {i}\n\n{PARAGRAPH * 3}- first point\n- second point\n\n" for i in range(10)
+)
+
+
+def bench(label: str, fn) -> float:
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        fn()
+    per_view = (time.process_time() - start) / ITERATIONS
+    print(
+        f"{label:12} {per_view * 1e6:>9.1f} us CPU/view  "
+        f"{per_view * PAGE_VIEWS_PER_SECOND:>6.2f} cores at {PAGE_VIEWS_PER_SECOND:,} views/s"
+    )
+    return per_view
+
+
+def main():
+    now = datetime.now()
+    post = {
+        "id": 1, "categoryId": 1, "authorId": 1, "title": "Contract law basics", "slug": "contract-law",
+        "content": CONTENT, "excerpt": None, "featuredImage": None, "isPublished": True,
+        "publishedAt": now, "viewCount": 0, "createdAt": now, "updatedAt": now,
+    }
+    rendered = {**post, **render_post_fields(CONTENT)}
+    print(f"post: {len(CONTENT):,} chars, {rendered['wordCount']} words\n")
+
+    def render_on_view():
+        BlogPostResponse.model_validate({**post, **render_post_fields(post["content"])}).model_dump_json()
+
+    def precomputed():
+        BlogPostResponse.model_validate(rendered).model_dump_json()
+
+    on_view = bench("render/view", render_on_view)
+    stored = bench("precomputed", precomputed)
+    print(f"\nsaved: {(on_view - stored) * PAGE_VIEWS_PER_SECOND:.2f} CPU cores at {PAGE_VIEWS_PER_SECOND:,} views/s")
+
+
+if __name__ == "__main__":
+    main()
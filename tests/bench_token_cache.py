@@ -0,0 +1,41 @@
+"""Micro-benchmark: decode_access_token throughput, cache hit vs miss"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.core.security import create_access_token, decode_access_token, token_cache
+
+ITERATIONS = 20000
+
+
+def bench(label: str, fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:10} {ITERATIONS / elapsed:>12,.0f} decodes/s  ({elapsed / ITERATIONS * 1e6:.2f} us/op)")
+
+
+def main():
+    token = create_access_token(data={"sub": "1"})
+
+    def miss():
+        token_cache.clear()
+        decode_access_token(token)
+
+    def hit():
+        decode_access_token(token)
+
+    bench("miss", miss)
+    decode_access_token(token)
+    bench("hit", hit)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ Tests all endpoints with mock data
 """
 import httpx
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 BASE_URL = "http://localhost:8000"
 
+# Header row of GET /admin/transactions/export
+TRANSACTION_EXPORT_COLUMNS = [
+    "id", "user_id", "amount", "type", "status",
+    "description", "reference_id", "created_at", "updated_at",
+]
+
 # Test results tracking
 results = {"passed": 0, "failed": 0, "errors": []}
 
@@ -69,6 +75,15 @@ async def test_auth_endpoints(client: httpx.AsyncClient) -> dict:
                        f"Status: {login_response.status_code}")
             if login_response.status_code == 200:
                 tokens["user"] = login_response.json().get("access_token")
+
+                # Test refresh token rotation and reuse detection
+                refresh_token = login_response.json().get("refresh_token")
+                refresh_response = await client.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": refresh_token})
+                log_result("POST /auth/refresh", refresh_response.status_code == 200,
+                           f"Status: {refresh_response.status_code}")
+                reuse_response = await client.post(f"{BASE_URL}/auth/refresh", json={"refresh_token": refresh_token})
+                log_result("POST /auth/refresh (reused token)", reuse_response.status_code == 401,
+                           f"Status: {reuse_response.status_code}")
     except Exception as e:
         log_result("Auth USER flow", False, str(e))
 
@@ -339,6 +354,32 @@ async def test_transaction_endpoints(client: httpx.AsyncClient, tokens: dict):
         except Exception as e:
             log_result("GET /transactions/ (admin)", False, str(e))
 
+        # CSV export restricted to a date range around the new transaction
+        try:
+            now = datetime.now(timezone.utc)
+            params = {
+                "from": (now - timedelta(hours=1)).isoformat(),
+                "to": (now + timedelta(hours=1)).isoformat(),
+            }
+            response = await client.get(f"{BASE_URL}/admin/transactions/export", params=params, headers=admin_headers)
+            lines = response.text.splitlines()
+            log_result(
+                "GET /admin/transactions/export (date range)",
+                response.status_code == 200 and lines[:1] == [",".join(TRANSACTION_EXPORT_COLUMNS)]
+                and any(line.startswith(f"{transaction_id},") for line in lines[1:]),
+                f"Status: {response.status_code}, Response: {response.text[:200]}"
+            )
+        except Exception as e:
+            log_result("GET /admin/transactions/export (date range)", False, str(e))
+
+        # Balance history (ledger entry written by the completed deposit)
+        try:
+            response = await client.get(f"{BASE_URL}/transactions/balance-history", headers=headers)
+            log_result("GET /transactions/balance-history", response.status_code == 200 and len(response.json()) == 1,
+                       f"Status: {response.status_code}, Response: {response.text[:200]}")
+        except Exception as e:
+            log_result("GET /transactions/balance-history", False, str(e))
+
 
 async def test_ai_chat_endpoints(client: httpx.AsyncClient, tokens: dict):
     """Test AI chat endpoints"""